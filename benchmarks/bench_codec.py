@@ -0,0 +1,108 @@
+"""
+Micro-benchmark de los codecs de mensajes de orders_queue.
+
+Compara, para los mensajes que publica el outbox de orders_service, el
+tamaño del cuerpo y el coste de codificar (publisher) y decodificar
+(consumer) con cada formato (JSON, msgpack, BSON), sin comprimir y con
+compresión deflate / gzip.
+
+Nota: JSON decodifica los datetime como texto; msgpack y BSON los
+devuelven como datetime, así que su decodificación hace algo más de trabajo.
+
+Uso:
+    python benchmarks/bench_codec.py
+    python benchmarks/bench_codec.py --batch-size 200 --min-time 1
+"""
+import os
+import sys
+import timeit
+import argparse
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from bson import ObjectId
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "reto2_microservices", "orders_service"))
+PRODUCTS = ("Laptop Dell XPS 15", "Mouse Logitech MX", "Keyboard Keychron K2", "Monitor LG 27", "Headphones Sony")
+
+
+def _order_created(i: int) -> Dict[str, Any]:
+    """Evento order.created tal como lo guarda el outbox (created_at es datetime)"""
+    return {
+        "_id": str(ObjectId()),
+        "product_name": PRODUCTS[i % len(PRODUCTS)],
+        "quantity": 1 + i % 5,
+        "customer_email": f"customer{i}@example.com",
+        "created_at": datetime.utcnow(),
+        "status": "pending",
+    }
+
+
+def _status_changed(i: int) -> Dict[str, Any]:
+    return {
+        "event_type": "order.status_changed",
+        "_id": str(ObjectId()),
+        "previous_status": "pending",
+        "status": "confirmed",
+        "changed_at": datetime.utcnow(),
+    }
+
+
+def _best_time(function: Callable[[], Any], min_time: float) -> float:
+    """Mejor tiempo por llamada (segundos) de 5 rondas de al menos min_time/5"""
+    calls = 1
+    while True:
+        elapsed = timeit.timeit(function, number=calls)
+        if elapsed >= min_time / 5:
+            break
+        calls *= 2
+    return min(elapsed, *timeit.repeat(function, repeat=4, number=calls)) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50, help="Órdenes del mensaje grande (sintético)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Segundos de medición por caso")
+    args = parser.parse_args()
+
+    from config.codec import CODECS, COMPRESSIONS, MessageCodec
+
+    payloads = {
+        "order.created": _order_created(1),
+        "status_changed": _status_changed(1),
+        # No existe hoy: muestra a partir de qué tamaño compensa comprimir
+        f"batch of {args.batch_size}": {"orders": [_order_created(i) for i in range(args.batch_size)]},
+    }
+
+    codecs = []
+    for name in CODECS:
+        for compression in (None, *COMPRESSIONS):
+            try:
+                # Sin umbral: se mide la compresión en todos los tamaños
+                codecs.append(MessageCodec(name, compression, compression_min_bytes=0))
+            except ImportError as e:
+                print(f"⚠️ Skipping {name}: {e}")
+                break
+
+    print(f"{'payload':<16}{'codec':<18}{'bytes':>8}{'vs json':>9}{'encode':>12}{'decode':>12}")
+    for label, message in payloads.items():
+        baseline = None
+        for codec in codecs:
+            body, content_type, content_encoding = codec.encode(message)
+            decoded = codec.decode(body, content_type, content_encoding)
+            assert decoded["_id" if "_id" in message else "orders"] is not None
+            baseline = baseline or len(body)
+
+            encode = _best_time(lambda: codec.encode(message), args.min_time)
+            decode = _best_time(lambda: codec.decode(body, content_type, content_encoding), args.min_time)
+            name = codec.codec.name + (f"+{codec.compression}" if codec.compression else "")
+            print(
+                f"{label:<16}{name:<18}{len(body):>8}{len(body) / baseline:>8.0%}"
+                f"{encode * 1e6:>10.1f}µs{decode * 1e6:>10.1f}µs"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Benchmark de throughput del consumer de notificaciones.
+
+Entrega `--messages` mensajes al RabbitMQConsumer real (callback, pool de
+workers, deduplicación, acks y modo batch) a través de una conexión y un
+canal en memoria que imitan a pika: el bucle principal hace de hilo de la
+conexión, respeta el prefetch (nunca hay más de `prefetch` mensajes sin
+ack) y ejecuta los callbacks que los workers programan con
+add_callback_threadsafe. Mide mensajes/s y la latencia entrega -> ack.
+
+No necesita RabbitMQ: mide el coste del consumer, no el del broker ni el
+de la red. NOTIFICATION_PROCESSING_TIME es 0 por defecto (--processing-time
+para simular el trabajo de cada notificación).
+
+Uso:
+    python benchmarks/bench_consumer.py
+    python benchmarks/bench_consumer.py --modes batch --batch-size 100 --messages 50000
+    python benchmarks/bench_consumer.py --workers 16 --processing-time 0.01
+    python benchmarks/bench_consumer.py --codec msgpack
+"""
+import os
+import sys
+import time
+import queue
+import uuid
+import logging
+import argparse
+import itertools
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from report import print_summary, summarize, write_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE_PATH = os.path.join(ROOT, "reto2_microservices", "notifications_service")
+PRODUCTS = ("Laptop", "Mouse", "Keyboard", "Monitor", "Headphones")
+
+
+class InMemoryConnection:
+    """
+    Sustituto de pika.BlockingConnection con lo que usa el consumer:
+    add_callback_threadsafe, call_later / remove_timeout y
+    process_data_events (que ejecuta en el hilo que la llama los callbacks
+    y temporizadores pendientes).
+    """
+
+    def __init__(self):
+        self.is_open = True
+        self.is_closed = False
+        self._callbacks: "queue.SimpleQueue[Callable[[], None]]" = queue.SimpleQueue()
+        self._timers: Dict[int, tuple] = {}
+        self._timer_ids = itertools.count(1)
+
+    def add_callback_threadsafe(self, callback: Callable[[], None]):
+        self._callbacks.put(callback)
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> int:
+        timer_id = next(self._timer_ids)
+        self._timers[timer_id] = (time.monotonic() + delay, callback)
+        return timer_id
+
+    def remove_timeout(self, timer_id: int):
+        self._timers.pop(timer_id, None)
+
+    def process_data_events(self, time_limit: float = 0):
+        """Espera hasta `time_limit` segundos un callback y ejecuta todo lo pendiente"""
+        now = time.monotonic()
+        for timer_id, (deadline, callback) in list(self._timers.items()):
+            if deadline <= now and self._timers.pop(timer_id, None) is not None:
+                callback()
+        if self._timers:
+            next_deadline = min(deadline for deadline, _ in self._timers.values())
+            time_limit = min(time_limit, max(0.0, next_deadline - time.monotonic()))
+        try:
+            callback = self._callbacks.get(timeout=time_limit) if time_limit > 0 else self._callbacks.get_nowait()
+        except queue.Empty:
+            return
+        callback()
+        while True:
+            try:
+                self._callbacks.get_nowait()()
+            except queue.Empty:
+                return
+
+    def close(self):
+        self.is_open = False
+        self.is_closed = True
+
+
+class InMemoryChannel:
+    """Sustituto de un canal de pika: registra acks (y su latencia desde la entrega) y republicaciones"""
+
+    def __init__(self):
+        self.is_open = True
+        self.unacked: Dict[int, float] = {}
+        self.latencies: List[float] = []
+        self.republished = 0
+
+    def deliver(self, delivery_tag: int):
+        self.unacked[delivery_tag] = time.perf_counter()
+
+    def basic_ack(self, delivery_tag: int, multiple: bool = False):
+        now = time.perf_counter()
+        tags = [tag for tag in self.unacked if tag <= delivery_tag] if multiple else [delivery_tag]
+        for tag in tags:
+            self.latencies.append(now - self.unacked.pop(tag))
+
+    def basic_publish(self, exchange: str, routing_key: str, body: bytes, properties=None, mandatory: bool = False):
+        # Reintentos y DLQ: el consumer confirma el original después
+        self.republished += 1
+
+    def stop_consuming(self):
+        pass
+
+
+def _messages(count: int, status_ratio: float, codec):
+    """Mensajes como los que publica el outbox de orders_service (cuerpo codificado y propiedades AMQP)"""
+    import pika
+
+    run_id = uuid.uuid4().hex[:8]
+    status_every = int(1 / status_ratio) if status_ratio > 0 else 0
+    now = datetime.utcnow().isoformat()
+    for i in range(count):
+        order_id = f"{run_id}{i:016x}"
+        if status_every and i % status_every == 0:
+            event_type = "order.status_changed"
+            payload = {
+                "event_type": event_type, "_id": order_id, "previous_status": "pending",
+                "status": "confirmed", "changed_at": now
+            }
+        else:
+            event_type = "order.created"
+            payload = {
+                "_id": order_id, "product_name": PRODUCTS[i % len(PRODUCTS)], "quantity": 1 + i % 5,
+                "customer_email": f"customer{i % 50}@example.com", "created_at": now, "status": "pending"
+            }
+        body, content_type, content_encoding = codec.encode(payload)
+        properties = pika.BasicProperties(
+            content_type=content_type, content_encoding=content_encoding, delivery_mode=2,
+            message_id=f"{run_id}-{i}", type=event_type
+        )
+        yield properties, body
+
+
+def run_mode(mode: str, args) -> Dict[str, Any]:
+    """Entrega todos los mensajes a un consumer en `mode` (single | batch) y espera sus acks"""
+    from concurrent.futures import ThreadPoolExecutor
+    from config.codec import MessageCodec
+    from config.rabbit import RabbitMQConsumer
+
+    os.environ["CONSUMER_MODE"] = mode
+    consumer = RabbitMQConsumer()
+    connection, channel = InMemoryConnection(), InMemoryChannel()
+    consumer.connection, consumer.channel = connection, channel
+    # Igual que start_consuming: un único worker en modo batch
+    consumer.executor = ThreadPoolExecutor(
+        max_workers=1 if mode == "batch" else consumer.workers, thread_name_prefix="notification"
+    )
+    codec = MessageCodec(args.codec, None if args.compression == "none" else args.compression, compression_min_bytes=0)
+    messages = list(_messages(args.messages, args.status_ratio, codec))
+
+    started = time.perf_counter()
+    delivered = 0
+    while delivered < len(messages) or channel.unacked:
+        # El broker entrega mientras haya hueco en el prefetch
+        while delivered < len(messages) and len(channel.unacked) < consumer.prefetch:
+            properties, body = messages[delivered]
+            delivered += 1
+            channel.deliver(delivered)
+            consumer.callback(channel, SimpleNamespace(delivery_tag=delivered), properties, body)
+        connection.process_data_events(time_limit=0.05)
+    elapsed = time.perf_counter() - started
+
+    consumer.executor.shutdown(wait=True)
+    # Los mensajes fallidos también se confirman (tras republicarse): cuentan en la latencia
+    result = summarize(channel.latencies, 0, elapsed)
+    result["failed"] = consumer.failed
+    result["config"] = {
+        "workers": 1 if mode == "batch" else consumer.workers,
+        "prefetch": consumer.prefetch,
+        "batch_size": consumer.batch_size if mode == "batch" else None,
+        "batch_linger_ms": consumer.batch_linger * 1000 if mode == "batch" else None,
+    }
+    result["duplicates"] = consumer.duplicates
+    result["republished"] = channel.republished
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000, help="Mensajes por modo")
+    parser.add_argument("--modes", default="single,batch", help="Modos del consumer (single, batch)")
+    parser.add_argument("--workers", type=int, help="CONSUMER_WORKERS (modo single)")
+    parser.add_argument("--prefetch", type=int, help="CONSUMER_PREFETCH")
+    parser.add_argument("--batch-size", type=int, help="CONSUMER_BATCH_SIZE")
+    parser.add_argument("--processing-time", type=float, default=0.0, help="NOTIFICATION_PROCESSING_TIME (segundos)")
+    parser.add_argument("--status-ratio", type=float, default=0.2, help="Fracción de eventos order.status_changed")
+    parser.add_argument("--codec", default="json", help="Formato de los mensajes (json, msgpack, bson)")
+    parser.add_argument("--compression", default="none", help="Compresión de los mensajes (none, deflate, gzip)")
+    parser.add_argument("--output", help="Fichero JSON de resultados (por defecto benchmarks/results/)")
+    parser.add_argument("--log-level", default="WARNING", help="Nivel de log del consumer")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+    # Configuración del consumer por entorno, como en el servicio
+    os.environ["NOTIFICATION_PROCESSING_TIME"] = str(args.processing_time)
+    for name, value in (("CONSUMER_WORKERS", args.workers), ("CONSUMER_PREFETCH", args.prefetch),
+                        ("CONSUMER_BATCH_SIZE", args.batch_size)):
+        if value is not None:
+            os.environ[name] = str(value)
+    sys.path.insert(0, SERVICE_PATH)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    print(f"Consumer benchmark: {args.messages} messages per mode, processing time {args.processing_time}s")
+    scenarios = {f"consumer_{mode}": run_mode(mode, args) for mode in modes}
+
+    print()
+    print_summary(scenarios, unit="msg/s")
+    config = {
+        "messages": args.messages,
+        "modes": modes,
+        "processing_time_s": args.processing_time,
+        "status_ratio": args.status_ratio,
+        "codec": args.codec,
+        "compression": args.compression,
+    }
+    path = write_results("consumer", config, scenarios, args.output)
+    print(f"\nResults written to {os.path.relpath(path, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
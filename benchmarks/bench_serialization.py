@@ -0,0 +1,166 @@
+"""
+Micro-benchmark de serialización de respuestas.
+
+Compara, por respuesta, el coste de CPU de:
+
+- **default**: el handler construye el modelo (validación), FastAPI lo
+  vuelve a validar contra el `response_model` (`serialize_response`) y lo
+  codifica con `jsonable_encoder` + `json.dumps` (`JSONResponse`).
+- **fast**: el handler construye el modelo sin validar (`model_construct`,
+  datos que ya vienen validados de MongoDB) y lo serializa una sola vez
+  con el serializador de Pydantic v2 (`ModelResponse`).
+
+Uso:
+    python benchmarks/bench_serialization.py                  # orders_service
+    python benchmarks/bench_serialization.py --service users  # reto1_user_service
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from bson import ObjectId
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = {
+    "orders": os.path.join(ROOT, "reto2_microservices", "orders_service"),
+    "users": os.path.join(ROOT, "reto1_user_service"),
+}
+PAGE_SIZES = (1, 100, 1000)
+
+
+def _orders_case():
+    from models.order import OrderResponse, OrderListResponse
+
+    def document(i: int) -> Dict[str, Any]:
+        return {
+            "_id": ObjectId(),
+            "product_name": f"Product {i}",
+            "quantity": 1 + i % 5,
+            "customer_email": f"customer{i}@example.com",
+            "created_at": datetime.utcnow(),
+            "status": "pending",
+        }
+
+    def validated(doc):
+        return OrderResponse(
+            _id=str(doc["_id"]), product_name=doc["product_name"], quantity=doc["quantity"],
+            customer_email=doc["customer_email"], created_at=doc["created_at"], status=doc["status"]
+        )
+
+    def constructed(doc):
+        return OrderResponse.model_construct(
+            id=str(doc["_id"]), product_name=doc["product_name"], quantity=doc["quantity"],
+            customer_email=doc["customer_email"], created_at=doc["created_at"], status=doc["status"]
+        )
+
+    def page(items, construct: bool):
+        if construct:
+            return OrderListResponse.model_construct(orders=items, next_cursor=None)
+        return OrderListResponse(orders=items, next_cursor=None)
+
+    return OrderResponse, OrderListResponse, document, validated, constructed, page
+
+
+def _users_case():
+    from models.user import UserResponse, UserListResponse
+
+    def document(i: int) -> Dict[str, Any]:
+        return {"_id": ObjectId(), "name": f"User {i}", "email": f"user{i}@example.com"}
+
+    def validated(doc):
+        return UserResponse(_id=str(doc["_id"]), name=doc["name"], email=doc["email"])
+
+    def constructed(doc):
+        return UserResponse.model_construct(name=doc["name"], email=doc["email"], id=str(doc["_id"]))
+
+    def page(items, construct: bool):
+        if construct:
+            return UserListResponse.model_construct(items=items, next_cursor=None)
+        return UserListResponse(items=items, next_cursor=None)
+
+    return UserResponse, UserListResponse, document, validated, constructed, page
+
+
+def _run_sync(coroutine) -> Any:
+    """
+    Ejecuta una corrutina que no llega a suspenderse (serialize_response con
+    is_coroutine=True) sin pasar por un event loop, para no medir su coste.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Coroutine suspended unexpectedly")
+
+
+def _measure(function: Callable[[], Any], min_time: float) -> float:
+    """Mejor tiempo por llamada (segundos) de varias rondas de al menos min_time/5"""
+    # Calibrar el número de llamadas por ronda
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 5:
+            break
+        calls *= 2
+
+    best = elapsed / calls
+    for _ in range(4):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--service", choices=sorted(SERVICES), default="orders")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Segundos de medición por caso")
+    args = parser.parse_args()
+
+    sys.path.insert(0, SERVICES[args.service])
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from config.responses import ModelResponse
+
+    item_model, page_model, document, validated, constructed, page = (
+        _orders_case() if args.service == "orders" else _users_case()
+    )
+    item_field = create_response_field(name="item", type_=item_model, mode="serialization")
+    page_field = create_response_field(name="page", type_=page_model, mode="serialization")
+
+    def default_path(docs: List[Dict[str, Any]], single: bool) -> bytes:
+        content = validated(docs[0]) if single else page([validated(doc) for doc in docs], construct=False)
+        field = item_field if single else page_field
+        encoded = _run_sync(serialize_response(field=field, response_content=content))
+        return JSONResponse(encoded).body
+
+    def fast_path(docs: List[Dict[str, Any]], single: bool) -> bytes:
+        content = constructed(docs[0]) if single else page([constructed(doc) for doc in docs], construct=True)
+        return ModelResponse(content).body
+
+    print(f"Response serialization ({args.service}_service), best per-response time")
+    print(f"{'case':<14}{'default':>14}{'fast':>14}{'speedup':>10}")
+    for size in PAGE_SIZES:
+        docs = [document(i) for i in range(size)]
+        single = size == 1
+        label = "single object" if single else f"page of {size}"
+
+        # Misma salida en los dos caminos (mismo JSON una vez parseado)
+        assert json.loads(default_path(docs, single)) == json.loads(fast_path(docs, single))
+
+        before = _measure(lambda: default_path(docs, single), args.min_time)
+        after = _measure(lambda: fast_path(docs, single), args.min_time)
+        print(f"{label:<14}{before * 1e6:>12.1f}µs{after * 1e6:>12.1f}µs{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
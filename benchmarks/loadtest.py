@@ -0,0 +1,351 @@
+"""
+Prueba de carga reproducible de user_service y orders_service.
+
+Lanza `--concurrency` clientes concurrentes por escenario (bucle cerrado:
+cada cliente envía la siguiente petición al recibir la respuesta) hasta
+completar `--requests` peticiones o `--duration` segundos, y muestra el
+throughput y las latencias p50/p95/p99. Cada ejecución se guarda como JSON
+en benchmarks/results/ junto con el commit, para comparar commits con
+benchmarks/report.py.
+
+Destinos:
+
+- **fake** (por defecto): la aplicación se ejecuta en el mismo proceso
+  (httpx + ASGITransport, con su lifespan) contra mongomock-motor y, en
+  orders, un publisher en memoria que confirma cada mensaje al instante.
+  No necesita Docker; mide el coste de la aplicación (validación, rutas,
+  serialización, caché, outbox), no el de MongoDB ni RabbitMQ.
+- **local**: la aplicación en el mismo proceso contra el MongoDB y el
+  RabbitMQ de MONGODB_URI / RABBITMQ_URL (p. ej. los de docker-compose).
+- **--url**: un servicio ya arrancado (uvicorn, docker-compose), por HTTP.
+
+Uso:
+    python benchmarks/loadtest.py --service orders
+    python benchmarks/loadtest.py --service users --scenarios get_user,list_users -c 64 -n 5000
+    python benchmarks/loadtest.py --service orders --backend local
+    python benchmarks/loadtest.py --service orders --url http://localhost:8002 --duration 30
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import asyncio
+import logging
+import argparse
+import itertools
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from report import print_summary, summarize, write_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = {
+    "users": {
+        "path": os.path.join(ROOT, "reto1_user_service"),
+        "database": "users_db",
+        "scenarios": ("create_user", "get_user", "list_users"),
+    },
+    "orders": {
+        "path": os.path.join(ROOT, "reto2_microservices", "orders_service"),
+        "database": "orders_db",
+        "scenarios": ("create_order", "get_order", "list_orders", "order_stats"),
+    },
+}
+PRODUCTS = ("Laptop", "Mouse", "Keyboard", "Monitor", "Headphones")
+CUSTOMERS = 50
+
+# (método, ruta, cuerpo JSON) de una petición
+RequestSpec = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+class Scenario:
+    """Un endpoint bajo carga: cómo construir la petición i y qué status se espera"""
+
+    def __init__(self, name: str, build: Callable[[int], RequestSpec], expected_status: int = 200):
+        self.name = name
+        self.build = build
+        self.expected_status = expected_status
+
+
+class LoadState:
+    """Datos compartidos entre escenarios: IDs creados (para las lecturas) y el generador aleatorio"""
+
+    def __init__(self, seed: int):
+        self.run_id = uuid.uuid4().hex[:8]
+        self.random = random.Random(seed)
+        self.ids: List[str] = []
+
+
+def _user_body(state: LoadState, i: int) -> Dict[str, Any]:
+    return {
+        "name": f"Load Test User {i}",
+        "email": f"loadtest-{state.run_id}-{i}@example.com",
+        "password": "loadtest-password",
+    }
+
+
+def _order_body(state: LoadState, i: int) -> Dict[str, Any]:
+    return {
+        "product_name": PRODUCTS[i % len(PRODUCTS)],
+        "quantity": 1 + i % 5,
+        "customer_email": f"customer{i % CUSTOMERS}@example.com",
+    }
+
+
+def build_scenarios(service: str, state: LoadState) -> Dict[str, Scenario]:
+    """Escenarios disponibles para un servicio"""
+    # Las creaciones usan un offset propio para no repetir emails con las del seed
+    created = itertools.count(1_000_000)
+
+    def random_id() -> str:
+        return state.random.choice(state.ids)
+
+    if service == "users":
+        return {
+            "create_user": Scenario(
+                "create_user", lambda i: ("POST", "/users/", _user_body(state, next(created))), 201
+            ),
+            "get_user": Scenario("get_user", lambda i: ("GET", f"/users/{random_id()}", None)),
+            "list_users": Scenario("list_users", lambda i: ("GET", "/users/?limit=20", None)),
+        }
+    return {
+        "create_order": Scenario(
+            "create_order", lambda i: ("POST", "/orders/", _order_body(state, next(created))), 201
+        ),
+        "get_order": Scenario("get_order", lambda i: ("GET", f"/orders/{random_id()}", None)),
+        "list_orders": Scenario(
+            "list_orders",
+            lambda i: ("GET", f"/orders/?customer_email=customer{state.random.randrange(CUSTOMERS)}@example.com&limit=20", None)
+        ),
+        "order_stats": Scenario("order_stats", lambda i: ("GET", "/orders/stats", None)),
+    }
+
+
+async def seed(client: httpx.AsyncClient, service: str, state: LoadState, count: int, concurrency: int):
+    """Crea `count` documentos por la API (no se mide) para los escenarios de lectura"""
+    path = "/users/" if service == "users" else "/orders/"
+    body = _user_body if service == "users" else _order_body
+    counter = itertools.count()
+
+    async def worker():
+        while (i := next(counter)) < count:
+            response = await client.post(path, json=body(state, i))
+            if response.status_code != 201:
+                raise RuntimeError(f"Seeding failed with {response.status_code}: {response.text[:200]}")
+            state.ids.append(response.json()["_id"])
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, count))))
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    requests: Optional[int],
+    duration: Optional[float]
+) -> Dict[str, Any]:
+    """
+    Ejecuta un escenario con `concurrency` clientes hasta completar
+    `requests` peticiones o agotar `duration` segundos.
+    """
+    latencies: List[float] = []
+    errors = 0
+    error_samples: Dict[str, int] = {}
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if requests is not None and i >= requests:
+                return
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            method, path, body = scenario.build(i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                outcome = None if response.status_code == scenario.expected_status else str(response.status_code)
+            except Exception as e:
+                outcome = type(e).__name__
+            elapsed = time.perf_counter() - start
+            if outcome is None:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+                error_samples[outcome] = error_samples.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, errors, time.perf_counter() - started)
+    if error_samples:
+        result["error_breakdown"] = error_samples
+    return result
+
+
+class InMemoryPublisher:
+    """
+    Sustituto en memoria del publisher de RabbitMQ: codifica el mensaje
+    igual que el real (MESSAGE_CODEC) y lo confirma al instante.
+    """
+
+    is_connected = True
+
+    def __init__(self):
+        from config.codec import get_message_codec
+        self.codec = get_message_codec()
+        self.published = 0
+        # Atributos que leen los gauges de /metrics
+        self._buffer: List[str] = []
+        self._inflight: Dict[int, Any] = {}
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def publish(
+        self,
+        message: Dict[str, Any],
+        message_id: Optional[str] = None,
+        message_type: Optional[str] = None,
+        headers: Optional[Dict[str, Any]] = None
+    ) -> Future:
+        self.codec.encode(message)
+        self.published += 1
+        future = Future()
+        future.set_result(True)
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        return {"connected": True, "published": self.published, "in_memory": True}
+
+
+def _install_fakes(service: str):
+    """Sustituye MongoDB por mongomock-motor y (en orders) RabbitMQ por InMemoryPublisher"""
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("❌ The fake backend needs mongomock-motor: pip install mongomock-motor (or use --backend local)")
+
+    import config.database as database_module
+
+    async def connect_to_fake_mongo():
+        client = AsyncMongoMockClient()
+        database_module.database.client = client
+        database_module.database.db = client[SERVICES[service]["database"]]
+        database_module.database.read_db = database_module.database.db
+        try:
+            await database_module.ensure_indexes(database_module.database.db)
+        except Exception as e:
+            # mongomock no soporta todas las opciones de índice (p. ej. índices parciales)
+            logging.getLogger(__name__).warning(f"⚠️ Some indexes are not supported by mongomock: {e}")
+
+    # main importa connect_to_mongo por nombre: hay que parchearlo antes de importar main
+    database_module.connect_to_mongo = connect_to_fake_mongo
+
+    if service == "orders":
+        import config.rabbit as rabbit_module
+        rabbit_module.rabbitmq_publisher = InMemoryPublisher()
+
+
+@asynccontextmanager
+async def open_client(args):
+    """Cliente HTTP contra el servicio: remoto (--url) o la aplicación en el mismo proceso"""
+    if args.url:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+            yield client
+        return
+
+    service_path = SERVICES[args.service]["path"]
+    sys.path.insert(0, service_path)
+    # load_dotenv() de main busca el .env del servicio desde el directorio actual
+    os.chdir(service_path)
+    if args.backend == "fake":
+        _install_fakes(args.service)
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            yield client
+
+
+async def run(args) -> Dict[str, Any]:
+    state = LoadState(args.seed)
+    available = build_scenarios(args.service, state)
+    names = args.scenarios.split(",") if args.scenarios else list(SERVICES[args.service]["scenarios"])
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        sys.exit(f"❌ Unknown scenarios for {args.service}: {', '.join(unknown)} (available: {', '.join(available)})")
+
+    results: Dict[str, Any] = {}
+    async with open_client(args) as client:
+        if args.seed_docs:
+            await seed(client, args.service, state, args.seed_docs, args.concurrency)
+            print(f"Seeded {len(state.ids)} documents")
+
+        for name in names:
+            scenario = available[name]
+            if args.warmup:
+                await run_scenario(client, scenario, args.concurrency, args.warmup, None)
+            results[name] = await run_scenario(
+                client, scenario, args.concurrency, None if args.duration else args.requests, args.duration
+            )
+            print(f"  {name}: {results[name]['throughput_per_s']:.1f} req/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--service", choices=sorted(SERVICES), required=True)
+    parser.add_argument("--backend", choices=("fake", "local"), default="fake",
+                        help="fake: mongomock-motor y publisher en memoria; local: MONGODB_URI / RABBITMQ_URL")
+    parser.add_argument("--url", help="URL de un servicio ya arrancado (ignora --backend)")
+    parser.add_argument("--scenarios", help="Escenarios separados por comas (por defecto todos)")
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="Clientes concurrentes")
+    parser.add_argument("-n", "--requests", type=int, default=1000, help="Peticiones medidas por escenario")
+    parser.add_argument("--duration", type=float, help="Segundos por escenario (en lugar de --requests)")
+    parser.add_argument("--warmup", type=int, default=50, help="Peticiones sin medir antes de cada escenario")
+    parser.add_argument("--seed-docs", type=int, default=200, help="Documentos creados antes de medir (lecturas)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla del generador aleatorio")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por petición (segundos)")
+    parser.add_argument("--output", help="Fichero JSON de resultados (por defecto benchmarks/results/)")
+    parser.add_argument("--log-level", default="WARNING", help="Nivel de log de los servicios")
+    args = parser.parse_args()
+
+    # Los servicios configuran logging al importarse; fijar el nivel antes evita medir el log de cada petición
+    logging.basicConfig(level=args.log_level.upper())
+    logging.getLogger().setLevel(args.log_level.upper())
+    # En modo en proceso se cambia al directorio del servicio (su .env)
+    output = os.path.abspath(args.output) if args.output else None
+
+    target = args.url or f"in-process ({args.backend})"
+    print(f"Load test: {args.service} service, {target}, concurrency {args.concurrency}")
+    scenarios = asyncio.run(run(args))
+
+    print()
+    print_summary(scenarios)
+    config = {
+        "service": args.service,
+        "target": target,
+        "concurrency": args.concurrency,
+        "requests": None if args.duration else args.requests,
+        "duration_s": args.duration,
+        "warmup": args.warmup,
+        "seed_docs": args.seed_docs,
+        "seed": args.seed,
+    }
+    path = write_results(args.service, config, scenarios, output)
+    print(f"\nResults written to {os.path.relpath(path, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Resumen y registro de resultados de los benchmarks.
+
+Lo usan loadtest.py y bench_consumer.py para calcular percentiles y guardar
+cada ejecución como JSON en benchmarks/results/ (con el commit de git), y
+se puede ejecutar para comparar dos ejecuciones:
+
+    python benchmarks/report.py results/orders-<antes>.json results/orders-<después>.json
+"""
+import os
+import sys
+import json
+import math
+import platform
+import argparse
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Variación (en %) a partir de la cual la comparación marca una regresión
+REGRESSION_THRESHOLD = 10.0
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """
+    Resumen de un escenario a partir de las latencias (segundos) de las
+    operaciones correctas: throughput y p50/p95/p99 en milisegundos.
+    """
+    values = sorted(latencies)
+    completed = len(values) + errors
+    return {
+        "requests": completed,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_per_s": round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(values, 0.50) * 1000, 3),
+            "p95": round(percentile(values, 0.95) * 1000, 3),
+            "p99": round(percentile(values, 0.99) * 1000, 3),
+            "mean": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            "max": round(values[-1] * 1000, 3) if values else 0.0,
+        },
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Commit actual (con sufijo -dirty si hay cambios sin confirmar)"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except Exception:
+        return None
+
+
+def write_results(name: str, config: Dict[str, Any], scenarios: Dict[str, Any], output: Optional[str] = None) -> str:
+    """Guarda la ejecución como JSON y retorna la ruta del fichero"""
+    now = datetime.now(timezone.utc)
+    commit = git_commit()
+    document = {
+        "benchmark": name,
+        "commit": commit,
+        "timestamp": now.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": config,
+        "scenarios": scenarios,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{name}-{now:%Y%m%dT%H%M%S}-{commit or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(document, f, indent=2)
+        f.write("\n")
+    return output
+
+
+def print_summary(scenarios: Dict[str, Any], unit: str = "req/s"):
+    """Tabla de throughput y latencias por escenario"""
+    print(f"{'scenario':<18}{'count':>8}{'errors':>8}{unit:>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, result in scenarios.items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:<18}{result['requests']:>8}{result['errors']:>8}{result['throughput_per_s']:>12.1f}"
+            f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}{latency['max']:>10.2f}"
+        )
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = REGRESSION_THRESHOLD) -> int:
+    """
+    Compara dos ejecuciones escenario a escenario (throughput y p99).
+
+    Returns:
+        Número de escenarios con una regresión mayor que `threshold` %
+    """
+    print(f"{baseline.get('benchmark')}: {baseline.get('commit')} -> {current.get('commit')}")
+    print(f"{'scenario':<18}{'throughput':>24}{'change':>9}{'p99 ms':>22}{'change':>9}")
+    regressions = 0
+    for name, after in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            print(f"{name:<18}{'(new)':>24}")
+            continue
+        throughput = _change(before["throughput_per_s"], after["throughput_per_s"])
+        p99 = _change(before["latency_ms"]["p99"], after["latency_ms"]["p99"])
+        regressed = throughput < -threshold or p99 > threshold
+        regressions += regressed
+        print(
+            f"{name:<18}{before['throughput_per_s']:>11.1f} -> {after['throughput_per_s']:>9.1f}{throughput:>+8.1f}%"
+            f"{before['latency_ms']['p99']:>9.2f} -> {after['latency_ms']['p99']:>9.2f}{p99:>+8.1f}%"
+            f"{'  ⚠️ regression' if regressed else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dos resultados de benchmark (JSON)")
+    parser.add_argument("baseline", help="Resultado de referencia")
+    parser.add_argument("current", help="Resultado a comparar")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Umbral de regresión en %%")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline.get("benchmark") != current.get("benchmark"):
+        print(f"⚠️ Comparing different benchmarks: {baseline.get('benchmark')} vs {current.get('benchmark')}")
+    # Código de salida distinto de cero si hay regresiones (para usarlo en CI)
+    sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
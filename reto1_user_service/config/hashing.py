@@ -0,0 +1,193 @@
+import os
+import asyncio
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+
+import bcrypt
+
+from config.settings import available_cpus, web_workers
+
+logger = logging.getLogger(__name__)
+
+
+class HashingQueueFullError(Exception):
+    """Se lanza cuando la cola de hashing está llena (backpressure)"""
+    pass
+
+
+def _hash_password_sync(password: str) -> str:
+    """Encripta la contraseña usando bcrypt (bloqueante, se ejecuta en el pool)"""
+    salt = bcrypt.gensalt()
+    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    return hashed.decode('utf-8')
+
+
+def _verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    """Verifica la contraseña contra el hash (bloqueante, se ejecuta en el pool)"""
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+class PasswordHasher:
+    """
+    Subsistema de hashing de contraseñas fuera del event loop.
+
+    bcrypt libera el GIL, por lo que un pool de hilos acotado permite
+    usar varios cores sin bloquear uvicorn. El número de operaciones
+    pendientes (en ejecución + en cola) está limitado: cuando se supera,
+    se lanza HashingQueueFullError para que la ruta responda 429.
+
+    Las importaciones masivas usan su propio cupo (HASH_BULK_CONCURRENCY
+    operaciones a la vez, como máximo pool_size - 1) y esperan turno en
+    él: nunca ocupan el cupo de las peticiones interactivas ni todos los
+    hilos del pool, así que las peticiones interactivas siguen
+    respondiendo mientras dura una importación. Con un pool de un solo
+    hilo no hay hilo libre: la importación avanza de uno en uno y cada
+    petición espera como mucho un hash.
+    """
+
+    def __init__(self):
+        # Por defecto los CPUs disponibles repartidos entre los workers del servidor
+        self.pool_size = int(os.getenv("HASH_POOL_SIZE", str(max(1, available_cpus() // web_workers()))))
+        self.queue_size = int(os.getenv("HASH_QUEUE_SIZE", "64"))
+        # Cupo de las importaciones masivas (por defecto, la mitad del pool):
+        # deja siempre al menos un hilo libre para las peticiones interactivas
+        bulk_concurrency = int(os.getenv("HASH_BULK_CONCURRENCY", str(max(1, self.pool_size // 2))))
+        self.bulk_concurrency = max(1, min(bulk_concurrency, self.pool_size - 1))
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._bulk_semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        self.pending = 0
+        self.bulk_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+
+    @property
+    def capacity(self) -> int:
+        """Máximo de operaciones pendientes (en ejecución + en cola)"""
+        return self.pool_size + self.queue_size
+
+    def start(self):
+        """Crea el pool de hilos de hashing"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.pool_size,
+                thread_name_prefix="bcrypt"
+            )
+            self._semaphore = asyncio.Semaphore(self.capacity)
+            self._bulk_semaphore = asyncio.Semaphore(self.bulk_concurrency)
+            logger.info(
+                f"✅ Password hasher started (pool: {self.pool_size}, queue: {self.queue_size}, "
+                f"bulk: {self.bulk_concurrency})"
+            )
+
+    def shutdown(self):
+        """Espera a que terminen los hashes pendientes y cierra el pool"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            self._semaphore = None
+            self._bulk_semaphore = None
+            logger.info("✅ Password hasher stopped")
+
+    def _timed(self, func, enqueued_at: float, *args):
+        """Ejecuta func en el pool registrando tiempo en cola y tiempo de hash"""
+        started_at = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished_at = time.perf_counter()
+            queue_wait = started_at - enqueued_at
+            hash_time = finished_at - started_at
+            with self._lock:
+                self.completed += 1
+                self.queue_wait_total += queue_wait
+                self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+                self.hash_time_total += hash_time
+                self.hash_time_max = max(self.hash_time_max, hash_time)
+
+    async def _run(self, func, *args, bulk: bool = False):
+        if self.executor is None:
+            self.start()
+
+        if bulk:
+            # Cupo propio: espera turno sin tocar el semáforo interactivo
+            self.bulk_pending += 1
+            try:
+                async with self._bulk_semaphore:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(
+                        self.executor, self._timed, func, time.perf_counter(), *args
+                    )
+            finally:
+                self.bulk_pending -= 1
+
+        # Backpressure: rechazar si no hay hueco
+        if self._semaphore.locked():
+            with self._lock:
+                self.rejected += 1
+            raise HashingQueueFullError(
+                f"Password hashing queue is full ({self.capacity} pending operations)"
+            )
+
+        self.pending += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self.executor, self._timed, func, time.perf_counter(), *args
+                )
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str, bulk: bool = False) -> str:
+        """
+        Encripta la contraseña en el pool de hashing.
+
+        Args:
+            password: Contraseña en texto plano
+            bulk: Si es True usa el cupo de importaciones masivas y espera
+                turno en lugar de lanzar HashingQueueFullError
+        """
+        return await self._run(_hash_password_sync, password, bulk=bulk)
+
+    async def verify(self, plain_password: str, hashed_password: str, bulk: bool = False) -> bool:
+        """Verifica la contraseña en el pool de hashing"""
+        return await self._run(_verify_password_sync, plain_password, hashed_password, bulk=bulk)
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas del pool: tiempo en cola vs. tiempo de hash (en milisegundos)"""
+        with self._lock:
+            completed = self.completed
+            return {
+                "pool_size": self.pool_size,
+                "queue_size": self.queue_size,
+                "bulk_concurrency": self.bulk_concurrency,
+                "pending": self.pending,
+                "bulk_pending": self.bulk_pending,
+                "completed": completed,
+                "rejected": self.rejected,
+                "queue_wait_avg_ms": (self.queue_wait_total / completed * 1000) if completed else 0.0,
+                "queue_wait_max_ms": self.queue_wait_max * 1000,
+                "hash_time_avg_ms": (self.hash_time_total / completed * 1000) if completed else 0.0,
+                "hash_time_max_ms": self.hash_time_max * 1000,
+            }
+
+
+# Instancia global del hasher
+password_hasher = PasswordHasher()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Retorna la instancia global del hasher"""
+    return password_hasher
@@ -0,0 +1,355 @@
+import os
+import time
+import random
+import logging
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (segundos) por defecto de los histogramas de latencia
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escapa un valor de etiqueta (barra invertida, comillas y saltos de línea)"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Etiquetas en formato de exposición de Prometheus: {a="1",b="2"}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base de las métricas: nombre, ayuda, etiquetas y un lock (se actualizan desde varios hilos)"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Contador monótono por combinación de etiquetas"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values]
+
+
+class Gauge(Metric):
+    """Valor instantáneo; puede calcularse al exponer con set_function()"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Calcula el valor (sin etiquetas) en cada exposición"""
+        self._function = function
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception as e:
+                logger.warning(f"⚠️ Could not compute gauge {self.name}: {e}")
+                return []
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values]
+
+
+class Histogram(Metric):
+    """
+    Histograma de buckets fijos por combinación de etiquetas.
+
+    observe() es O(log buckets) y no guarda las muestras, así que la
+    memoria depende solo del número de combinaciones de etiquetas.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: [conteos por bucket (+Inf al final), suma]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][position] += 1
+            state[1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+
+        lines = []
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso y su exposición en formato texto de Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Todas las métricas en formato de exposición de texto (text/plain; version=0.0.4)"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+# Instancia global del registro
+metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Retorna el registro global de métricas"""
+    return metrics
+
+
+# Métricas del servicio
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route template and status code",
+    ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_PROGRESS = metrics.gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ("method",)
+)
+MONGODB_COMMAND_DURATION = metrics.histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by command name",
+    ("command",)
+)
+MONGODB_COMMAND_FAILURES = metrics.counter(
+    "mongodb_command_failures_total",
+    "Failed MongoDB commands by command name",
+    ("command",)
+)
+
+MONGODB_POOL_WAIT = metrics.histogram(
+    "mongodb_pool_wait_seconds",
+    "Time spent waiting to check out a connection from the MongoDB pool"
+)
+MONGODB_POOL_CHECKOUT_FAILURES = metrics.counter(
+    "mongodb_pool_checkout_failures_total",
+    "Failed connection checkouts by reason (e.g. timeout)",
+    ("reason",)
+)
+MONGODB_POOL_CONNECTIONS = metrics.gauge(
+    "mongodb_pool_connections",
+    "Open connections in the MongoDB pool"
+)
+MONGODB_POOL_CHECKED_OUT = metrics.gauge(
+    "mongodb_pool_checked_out",
+    "MongoDB connections currently in use"
+)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Listener de comandos de pymongo: registra la latencia de cada comando
+    (la mide el driver) por nombre de comando.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGODB_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        MONGODB_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name)
+        MONGODB_COMMAND_FAILURES.inc(event.command_name)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Listener del pool de conexiones de pymongo: tiempo de espera para
+    obtener una conexión (incluye abrirla si no había ninguna libre),
+    checkouts fallidos y conexiones abiertas / en uso.
+    """
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        MONGODB_POOL_CONNECTIONS.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGODB_POOL_CONNECTIONS.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        if event.duration is not None:
+            MONGODB_POOL_WAIT.observe(event.duration)
+        MONGODB_POOL_CHECKOUT_FAILURES.inc(str(event.reason))
+
+    def connection_checked_out(self, event):
+        if event.duration is not None:
+            MONGODB_POOL_WAIT.observe(event.duration)
+        MONGODB_POOL_CHECKED_OUT.inc()
+
+    def connection_checked_in(self, event):
+        MONGODB_POOL_CHECKED_OUT.dec()
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición HTTP con un reloj monótono.
+
+    La latencia se etiqueta con la plantilla de la ruta (`/orders/{order_id}`),
+    no con la ruta real, para que el número de series no crezca con los IDs.
+    Añade la cabecera X-Process-Time y registra una línea de log solo para
+    una fracción de las peticiones (REQUEST_LOG_SAMPLE_RATE, 0 = ninguna).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.log_sample_rate = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "0"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-process-time", f"{elapsed_ms:.2f}ms".encode())
+                ]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc(method)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec(method)
+            elapsed = time.perf_counter() - start
+            # FastAPI deja la ruta resuelta en el scope; sin ruta (404) se agrupa aparte
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(elapsed, method, template, str(status_code))
+
+            if self.log_sample_rate > 0 and random.random() < self.log_sample_rate:
+                logger.info(
+                    f"📊 {method} {scope['path']} - "
+                    f"Status: {status_code} - "
+                    f"Time: {elapsed * 1000:.2f}ms"
+                )
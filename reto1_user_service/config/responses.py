@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ModelResponse(JSONResponse):
+    """
+    Respuesta JSON para un modelo de Pydantic ya construido.
+
+    Si un handler devuelve el modelo, FastAPI lo valida otra vez contra el
+    response_model y lo codifica con jsonable_encoder + json.dumps.
+    Devolviendo una Response se omite ese paso: el modelo se serializa una
+    sola vez con el serializador de Pydantic v2 (en Rust). El
+    response_model del decorador se mantiene para la documentación.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json(by_alias=True).encode("utf-8")
+        return super().render(content)
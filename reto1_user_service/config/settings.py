@@ -0,0 +1,122 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import ReadPreference
+
+# Modos de read preference aceptados en MONGODB_READ_PREFERENCE
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def available_cpus() -> int:
+    """CPUs que puede usar este proceso (afinidad del contenedor), no los del host"""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        # sched_getaffinity no existe en macOS / Windows
+        return os.cpu_count() or 1
+
+
+def web_workers() -> int:
+    """Procesos worker del servidor (WEB_CONCURRENCY, que serve.py exporta a cada worker)"""
+    return max(1, _env_int("WEB_CONCURRENCY", 1))
+
+
+def _env_optional_ms(name: str, default: int = 0) -> Optional[int]:
+    """Milisegundos desde el entorno; 0 significa sin límite (None para el driver)"""
+    value = _env_int(name, default)
+    return value if value > 0 else None
+
+
+@dataclass(frozen=True)
+class MongoSettings:
+    """
+    Configuración tipada de la conexión a MongoDB.
+
+    Se lee una vez del entorno (from_env) y se traduce a los argumentos
+    de AsyncIOMotorClient (client_kwargs); así el pool, los timeouts y la
+    compresión se ajustan por variables de entorno sin tocar el código.
+    """
+
+    uri: str
+    database_name: str
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    max_connecting: int = 2
+    wait_queue_timeout_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 5000
+    connect_timeout_ms: int = 10000
+    socket_timeout_ms: Optional[int] = None
+    compressors: Tuple[str, ...] = ()
+    read_preference: str = "primary"
+    warm_up: bool = True
+
+    @classmethod
+    def from_env(cls, default_database: str) -> "MongoSettings":
+        compressors = tuple(
+            name.strip() for name in os.getenv("MONGODB_COMPRESSORS", "").split(",") if name.strip()
+        )
+        read_preference = os.getenv("MONGODB_READ_PREFERENCE", "primary")
+        if read_preference not in READ_PREFERENCES:
+            raise ValueError(
+                f"Invalid MONGODB_READ_PREFERENCE '{read_preference}' "
+                f"(expected one of: {', '.join(READ_PREFERENCES)})"
+            )
+
+        settings = cls(
+            uri=os.getenv("MONGODB_URI", "mongodb://localhost:27017"),
+            database_name=os.getenv("DATABASE_NAME", default_database),
+            # Con varios workers el pool por defecto se reparte entre ellos
+            max_pool_size=_env_int("MONGODB_MAX_POOL_SIZE", max(1, 100 // web_workers())),
+            min_pool_size=_env_int("MONGODB_MIN_POOL_SIZE", 0),
+            max_idle_time_ms=_env_optional_ms("MONGODB_MAX_IDLE_TIME_MS"),
+            max_connecting=_env_int("MONGODB_MAX_CONNECTING", 2),
+            wait_queue_timeout_ms=_env_optional_ms("MONGODB_WAIT_QUEUE_TIMEOUT_MS"),
+            server_selection_timeout_ms=_env_int("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 5000),
+            connect_timeout_ms=_env_int("MONGODB_CONNECT_TIMEOUT_MS", 10000),
+            socket_timeout_ms=_env_optional_ms("MONGODB_SOCKET_TIMEOUT_MS"),
+            compressors=compressors,
+            read_preference=read_preference,
+            warm_up=os.getenv("MONGODB_WARM_UP", "true").lower() in ("1", "true", "yes"),
+        )
+        if settings.min_pool_size > settings.max_pool_size:
+            raise ValueError("MONGODB_MIN_POOL_SIZE cannot be greater than MONGODB_MAX_POOL_SIZE")
+        return settings
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Argumentos del pool, timeouts y compresión para AsyncIOMotorClient"""
+        kwargs: Dict[str, Any] = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxConnecting": self.max_connecting,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+        }
+        if self.max_idle_time_ms is not None:
+            kwargs["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.wait_queue_timeout_ms is not None:
+            kwargs["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        if self.socket_timeout_ms is not None:
+            kwargs["socketTimeoutMS"] = self.socket_timeout_ms
+        if self.compressors:
+            kwargs["compressors"] = ",".join(self.compressors)
+        return kwargs
+
+    def describe(self) -> str:
+        """Resumen para el log de arranque (sin credenciales)"""
+        return (
+            f"pool {self.min_pool_size}-{self.max_pool_size}, "
+            f"compressors: {','.join(self.compressors) or 'none'}, "
+            f"reads: {self.read_preference}"
+        )
@@ -1,13 +1,10 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-import time
 import logging
 from dotenv import load_dotenv
 
-from config.database import connect_to_mongo, close_mongo_connection
-from routes.user_routes import router as user_router
-
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -15,9 +12,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Cargar variables de entorno
+# Cargar variables de entorno (antes de importar los módulos que leen la configuración)
 load_dotenv()
 
+from config.database import connect_to_mongo, close_mongo_connection
+from config.hashing import get_password_hasher
+from config.cache import get_cache
+from config.metrics import get_metrics, MetricsMiddleware
+from routes.user_routes import router as user_router
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -28,9 +31,11 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting User Service...")
     await connect_to_mongo()
+    get_password_hasher().start()
     yield
     # Shutdown
     logger.info("🛑 Shutting down User Service...")
+    get_password_hasher().shutdown()
     await close_mongo_connection()
 
 
@@ -52,32 +57,8 @@ app.add_middleware(
 )
 
 
-# Middleware para medir tiempo de respuesta
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """
-    Middleware que registra el tiempo de respuesta de cada petición.
-    Muestra método, ruta, tiempo de ejecución y código de estado.
-    """
-    start_time = time.time()
-    
-    # Procesar la petición
-    response = await call_next(request)
-    
-    # Calcular tiempo de ejecución
-    process_time = (time.time() - start_time) * 1000  # Convertir a milisegundos
-    
-    # Logging detallado
-    logger.info(
-        f"📊 {request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.2f}ms"
-    )
-    
-    # Agregar header con el tiempo de respuesta
-    response.headers["X-Process-Time"] = f"{process_time:.2f}ms"
-    
-    return response
+# Métricas de latencia por ruta (sustituye al log de cada petición; ver REQUEST_LOG_SAMPLE_RATE)
+app.add_middleware(MetricsMiddleware)
 
 
 # Incluir rutas
@@ -103,6 +84,21 @@ async def health_check():
     }
 
 
+@app.get("/stats", tags=["Health"])
+async def stats():
+    """Métricas internas del servicio (pool de hashing y caché)"""
+    return {
+        "hashing": get_password_hasher().stats(),
+        "cache": get_cache().stats()
+    }
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Métricas en formato de exposición de texto de Prometheus"""
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,6 +1,6 @@
 from bson import ObjectId
 from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional
+from typing import Optional, List
 
 
 class PyObjectId(ObjectId):
@@ -67,6 +67,44 @@ class UserResponse(UserBase):
         }
 
 
+class UserListResponse(BaseModel):
+    """Model for a page of users (keyset pagination)"""
+    items: List[UserResponse] = Field(..., description="Users in this page")
+    next_cursor: Optional[str] = Field(None, description="Pass as 'after' to get the next page (null on last page)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {
+                        "id": "507f1f77bcf86cd799439011",
+                        "name": "John Doe",
+                        "email": "john@example.com"
+                    }
+                ],
+                "next_cursor": "507f1f77bcf86cd799439011"
+            }
+        }
+
+
+class BulkUserResult(BaseModel):
+    """Result of a single row in a bulk import"""
+    index: int = Field(..., description="Position of the row in the request body")
+    status: str = Field(..., description="created | duplicate | invalid | error")
+    id: Optional[str] = Field(None, description="ID of the created user")
+    email: Optional[str] = Field(None, description="Email of the row (if it could be read)")
+    error: Optional[str] = Field(None, description="Reason why the row was not created")
+
+
+class BulkImportResponse(BaseModel):
+    """Model for the bulk import report"""
+    created: int = Field(..., description="Number of users created")
+    duplicates: int = Field(..., description="Rows rejected because the email already exists")
+    invalid: int = Field(..., description="Rows that failed validation")
+    errors: int = Field(..., description="Rows that failed for other reasons")
+    results: List[BulkUserResult] = Field(..., description="Per-row results, in request order")
+
+
 class UserInDB(UserBase):
     """Model for user stored in database"""
     id: Optional[PyObjectId] = Field(default=None, alias="_id")
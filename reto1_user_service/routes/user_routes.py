@@ -1,27 +1,84 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
-from typing import List
-import bcrypt
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
+import os
+import re
+import json
+import asyncio
 import logging
 
-from models.user import UserCreate, UserUpdate, UserResponse, UserInDB
-from config.database import get_database
+from models.user import (
+    UserCreate, UserUpdate, UserResponse, UserListResponse, UserInDB,
+    BulkUserResult, BulkImportResponse
+)
+from config.database import get_database, get_read_database
+from config.hashing import get_password_hasher, HashingQueueFullError
+from config.cache import get_cache
+from config.responses import ModelResponse
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+# Proyección pública: nunca se carga hashed_password desde MongoDB
+USER_PUBLIC_PROJECTION = {"name": 1, "email": 1}
 
-def hash_password(password: str) -> str:
-    """Encripta la contraseña usando bcrypt"""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+# Tamaño de lote del cursor para exportaciones NDJSON
+EXPORT_BATCH_SIZE = int(os.getenv("USERS_EXPORT_BATCH_SIZE", "1000"))
 
+# Filas por insert_many en la importación masiva
+BULK_CHUNK_SIZE = int(os.getenv("USERS_BULK_CHUNK_SIZE", "500"))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica si la contraseña coincide con el hash"""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+# Código de error de MongoDB para clave duplicada
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _user_cache_key(user_id: str) -> str:
+    """Clave de caché de un usuario"""
+    return f"user:{user_id}"
+
+
+def _hashing_busy_error() -> HTTPException:
+    """Error 429 cuando el pool de hashing no admite más trabajo"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many password operations in progress, retry later",
+        headers={"Retry-After": "1"}
+    )
+
+
+async def hash_password(password: str) -> str:
+    """
+    Encripta la contraseña usando bcrypt en el pool de hashing.
+
+    Si la cola de hashing está llena responde 429 (backpressure).
+    """
+    try:
+        return await get_password_hasher().hash(password)
+    except HashingQueueFullError as e:
+        logger.warning(f"⚠️ {e}")
+        raise _hashing_busy_error()
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica si la contraseña coincide con el hash (en el pool de hashing)"""
+    try:
+        return await get_password_hasher().verify(plain_password, hashed_password)
+    except HashingQueueFullError as e:
+        logger.warning(f"⚠️ {e}")
+        raise _hashing_busy_error()
+
+
+def _user_response(user: Dict[str, Any]) -> UserResponse:
+    """
+    UserResponse a partir de datos ya validados (el documento de MongoDB o
+    lo que se acaba de insertar), sin volver a validarlos.
+    """
+    return UserResponse.model_construct(name=user["name"], email=user["email"], id=str(user["_id"]))
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -36,16 +93,8 @@ async def create_user(user: UserCreate):
     try:
         db = get_database()
         
-        # Verificar si el email ya existe
-        existing_user = await db.users.find_one({"email": user.email})
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Email {user.email} already registered"
-            )
-        
         # Encriptar password
-        hashed_password = hash_password(user.password)
+        hashed_password = await hash_password(user.password)
         
         # Crear documento de usuario
         user_dict = {
@@ -54,18 +103,21 @@ async def create_user(user: UserCreate):
             "hashed_password": hashed_password
         }
         
-        # Insertar en MongoDB
-        result = await db.users.insert_one(user_dict)
-        
-        # Obtener el usuario creado
-        created_user = await db.users.find_one({"_id": result.inserted_id})
+        # Insertar en MongoDB (el índice único sobre email detecta duplicados)
+        try:
+            result = await db.users.insert_one(user_dict)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Email {user.email} already registered"
+            )
         
         logger.info(f"✅ User created successfully: {user.email}")
         
-        return UserResponse(
-            _id=str(created_user["_id"]),
-            name=created_user["name"],
-            email=created_user["email"]
+        # Construir la respuesta desde el documento insertado (sin releer ni revalidar)
+        return ModelResponse(
+            _user_response({**user_dict, "_id": result.inserted_id}),
+            status_code=status.HTTP_201_CREATED
         )
         
     except HTTPException:
@@ -78,6 +130,264 @@ async def create_user(user: UserCreate):
         )
 
 
+async def _iter_bulk_rows(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Itera las filas del cuerpo de la importación masiva.
+
+    - `application/x-ndjson`: se lee el cuerpo en streaming, una fila por línea
+    - cualquier otro content type: se espera un array JSON
+
+    Las líneas NDJSON que no son JSON válido se emiten como ValueError.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type:
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    yield index, json.loads(line)
+                except ValueError as e:
+                    yield index, ValueError(f"Invalid JSON: {e}")
+                index += 1
+        if buffer.strip():
+            try:
+                yield index, json.loads(buffer)
+            except ValueError as e:
+                yield index, ValueError(f"Invalid JSON: {e}")
+        return
+
+    try:
+        rows = await request.json()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array or NDJSON"
+        )
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array of users"
+        )
+    for index, row in enumerate(rows):
+        yield index, row
+
+
+def _validation_message(error: ValidationError) -> str:
+    """Resume los errores de Pydantic en una línea"""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+async def _import_chunk(db, chunk: List[Tuple[int, Any]]) -> List[BulkUserResult]:
+    """
+    Valida, encripta e inserta un bloque de filas.
+
+    Los hashes se calculan en paralelo en el pool de hashing y el bloque se
+    escribe con un único insert_many no ordenado: un email duplicado solo
+    rechaza su fila, no el bloque entero.
+    """
+    results: List[BulkUserResult] = []
+    valid: List[Tuple[int, UserCreate]] = []
+
+    for index, row in chunk:
+        if isinstance(row, ValueError):
+            results.append(BulkUserResult(index=index, status="invalid", error=str(row)))
+            continue
+        try:
+            valid.append((index, UserCreate.model_validate(row)))
+        except ValidationError as e:
+            email = row.get("email") if isinstance(row, dict) else None
+            results.append(BulkUserResult(
+                index=index, status="invalid", email=email if isinstance(email, str) else None,
+                error=_validation_message(e)
+            ))
+
+    if not valid:
+        return results
+
+    # Encriptar en paralelo con el cupo de importaciones (espera turno en vez de
+    # responder 429 y no ocupa el cupo de las peticiones interactivas)
+    hasher = get_password_hasher()
+    hashes = await asyncio.gather(*(hasher.hash(user.password, bulk=True) for _, user in valid))
+
+    docs = [
+        {"name": user.name, "email": user.email, "hashed_password": hashed}
+        for (_, user), hashed in zip(valid, hashes)
+    ]
+
+    failed: Dict[int, Dict[str, Any]] = {}
+    try:
+        await db.users.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+
+    # insert_many asigna _id en cada documento antes de enviarlo
+    for position, ((index, user), doc) in enumerate(zip(valid, docs)):
+        error = failed.get(position)
+        if error is None:
+            results.append(BulkUserResult(index=index, status="created", id=str(doc["_id"]), email=user.email))
+        elif error.get("code") == DUPLICATE_KEY_ERROR:
+            results.append(BulkUserResult(
+                index=index, status="duplicate", email=user.email,
+                error=f"Email {user.email} already registered"
+            ))
+        else:
+            results.append(BulkUserResult(
+                index=index, status="error", email=user.email, error=error.get("errmsg")
+            ))
+
+    return results
+
+
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_create_users(request: Request):
+    """
+    Importación masiva de usuarios.
+
+    Acepta un array JSON o un cuerpo NDJSON (`Content-Type: application/x-ndjson`,
+    una fila `{"name", "email", "password"}` por línea, leído en streaming).
+    Cada fila se valida con `UserCreate`; las válidas se insertan en bloques de
+    `USERS_BULK_CHUNK_SIZE` con `insert_many` no ordenado.
+
+    Devuelve un informe por fila (**created** / **duplicate** / **invalid** / **error**)
+    sin abortar el lote completo.
+    """
+    try:
+        db = get_database()
+
+        results: List[BulkUserResult] = []
+        chunk: List[Tuple[int, Any]] = []
+
+        async for row in _iter_bulk_rows(request):
+            chunk.append(row)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                results.extend(await _import_chunk(db, chunk))
+                chunk = []
+        if chunk:
+            results.extend(await _import_chunk(db, chunk))
+
+        results.sort(key=lambda result: result.index)
+        counts = {"created": 0, "duplicate": 0, "invalid": 0, "error": 0}
+        for result in results:
+            counts[result.status] += 1
+
+        logger.info(
+            f"✅ Bulk import finished: {counts['created']} created, "
+            f"{counts['duplicate']} duplicates, {counts['invalid']} invalid, {counts['error']} errors"
+        )
+
+        return ModelResponse(BulkImportResponse.model_construct(
+            created=counts["created"],
+            duplicates=counts["duplicate"],
+            invalid=counts["invalid"],
+            errors=counts["error"],
+            results=results
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error importing users: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error importing users: {str(e)}"
+        )
+
+
+def _build_list_filter(
+    after: Optional[str],
+    name_prefix: Optional[str],
+    email_prefix: Optional[str]
+) -> Dict[str, Any]:
+    """Construye el filtro de MongoDB para el listado (keyset sobre _id + prefijos)"""
+    query: Dict[str, Any] = {}
+
+    if after is not None:
+        if not ObjectId.is_valid(after):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor format"
+            )
+        query["_id"] = {"$gt": ObjectId(after)}
+
+    # Regex anclada al inicio para que MongoDB pueda usar los índices
+    if name_prefix:
+        query["name"] = {"$regex": f"^{re.escape(name_prefix)}"}
+    if email_prefix:
+        query["email"] = {"$regex": f"^{re.escape(email_prefix)}"}
+
+    return query
+
+
+async def _export_ndjson(cursor):
+    """Itera el cursor por lotes y emite una línea JSON por usuario (memoria constante)"""
+    async for user in cursor:
+        yield json.dumps({
+            "id": str(user["_id"]),
+            "name": user["name"],
+            "email": user["email"]
+        }) + "\n"
+
+
+@router.get("/", response_model=UserListResponse)
+async def list_users(
+    limit: int = Query(50, ge=1, le=500, description="Máximo de usuarios por página"),
+    after: Optional[str] = Query(None, description="Cursor: ID del último usuario de la página anterior"),
+    name_prefix: Optional[str] = Query(None, min_length=1, description="Filtrar por prefijo del nombre"),
+    email_prefix: Optional[str] = Query(None, min_length=1, description="Filtrar por prefijo del email"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="'ndjson' para exportación completa en streaming")
+):
+    """
+    Listar usuarios con paginación por cursor (keyset sobre _id, sin skip).
+
+    - **limit**: Tamaño de página (1-500)
+    - **after**: Valor de `next_cursor` de la página anterior
+    - **name_prefix** / **email_prefix**: Filtros opcionales por prefijo
+    - **format**: `ndjson` exporta todos los usuarios que cumplan el filtro en streaming
+    """
+    try:
+        db = get_read_database()
+
+        query = _build_list_filter(after, name_prefix, email_prefix)
+
+        if format == "ndjson":
+            # Exportación completa: el cursor se consume por lotes, sin materializar la lista
+            cursor = db.users.find(query, USER_PUBLIC_PROJECTION).sort("_id", 1).batch_size(EXPORT_BATCH_SIZE)
+            logger.info("✅ Streaming users export (NDJSON)")
+            return StreamingResponse(_export_ndjson(cursor), media_type="application/x-ndjson")
+
+        # Pedir un documento extra para saber si hay página siguiente
+        cursor = db.users.find(query, USER_PUBLIC_PROJECTION).sort("_id", 1).limit(limit + 1)
+        users = await cursor.to_list(length=limit + 1)
+
+        has_more = len(users) > limit
+        users = users[:limit]
+
+        logger.info(f"✅ Users listed: {len(users)}")
+
+        return ModelResponse(UserListResponse.model_construct(
+            items=[_user_response(user) for user in users],
+            next_cursor=str(users[-1]["_id"]) if has_more else None
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error listing users: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error listing users: {str(e)}"
+        )
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: str):
     """
@@ -86,7 +396,7 @@ async def get_user(user_id: str):
     - **user_id**: ID único del usuario (ObjectId de MongoDB)
     """
     try:
-        db = get_database()
+        db = get_read_database()
         
         # Validar ObjectId
         if not ObjectId.is_valid(user_id):
@@ -95,8 +405,14 @@ async def get_user(user_id: str):
                 detail="Invalid user ID format"
             )
         
-        # Buscar usuario
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
+        async def load_user():
+            user = await db.users.find_one({"_id": ObjectId(user_id)}, USER_PUBLIC_PROJECTION)
+            if user:
+                user["_id"] = str(user["_id"])
+            return user
+        
+        # Buscar usuario (primero en caché)
+        user = await get_cache().get_or_load(_user_cache_key(user_id), load_user)
         
         if not user:
             raise HTTPException(
@@ -106,11 +422,7 @@ async def get_user(user_id: str):
         
         logger.info(f"✅ User retrieved: {user_id}")
         
-        return UserResponse(
-            _id=str(user["_id"]),
-            name=user["name"],
-            email=user["email"]
-        )
+        return ModelResponse(_user_response(user))
         
     except HTTPException:
         raise
@@ -140,14 +452,6 @@ async def update_user(user_id: str, user_update: UserUpdate):
                 detail="Invalid user ID format"
             )
         
-        # Verificar que el usuario existe
-        existing_user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with ID {user_id} not found"
-            )
-        
         # Preparar datos de actualización (solo campos no nulos)
         update_data = {}
         
@@ -155,20 +459,10 @@ async def update_user(user_id: str, user_update: UserUpdate):
             update_data["name"] = user_update.name
         
         if user_update.email is not None:
-            # Verificar que el nuevo email no esté en uso por otro usuario
-            email_exists = await db.users.find_one({
-                "email": user_update.email,
-                "_id": {"$ne": ObjectId(user_id)}
-            })
-            if email_exists:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Email {user_update.email} already in use"
-                )
             update_data["email"] = user_update.email
         
         if user_update.password is not None:
-            update_data["hashed_password"] = hash_password(user_update.password)
+            update_data["hashed_password"] = await hash_password(user_update.password)
         
         # Si no hay campos para actualizar
         if not update_data:
@@ -177,22 +471,32 @@ async def update_user(user_id: str, user_update: UserUpdate):
                 detail="No fields to update"
             )
         
-        # Actualizar en MongoDB
-        await db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": update_data}
-        )
+        # Actualizar y obtener el documento resultante en un solo round trip
+        # (el índice único rechaza un email en uso por otro usuario)
+        try:
+            updated_user = await db.users.find_one_and_update(
+                {"_id": ObjectId(user_id)},
+                {"$set": update_data},
+                projection=USER_PUBLIC_PROJECTION,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Email {user_update.email} already in use"
+            )
         
-        # Obtener usuario actualizado
-        updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
+        if not updated_user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with ID {user_id} not found"
+            )
+        
+        await get_cache().invalidate(_user_cache_key(user_id))
         
         logger.info(f"✅ User updated successfully: {user_id}")
         
-        return UserResponse(
-            _id=str(updated_user["_id"]),
-            name=updated_user["name"],
-            email=updated_user["email"]
-        )
+        return ModelResponse(_user_response(updated_user))
         
     except HTTPException:
         raise
@@ -221,16 +525,15 @@ async def delete_user(user_id: str):
                 detail="Invalid user ID format"
             )
         
-        # Verificar que el usuario existe
-        existing_user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not existing_user:
+        # Eliminar usuario (deleted_count indica si existía, sin lectura previa)
+        result = await db.users.delete_one({"_id": ObjectId(user_id)})
+        if result.deleted_count == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"User with ID {user_id} not found"
             )
         
-        # Eliminar usuario
-        await db.users.delete_one({"_id": ObjectId(user_id)})
+        await get_cache().invalidate(_user_cache_key(user_id))
         
         logger.info(f"✅ User deleted successfully: {user_id}")
         
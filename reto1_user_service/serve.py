@@ -0,0 +1,96 @@
+"""
+Servidor de producción: uno o varios procesos worker de uvicorn.
+
+Cada worker es un proceso independiente que importa la app y ejecuta su
+lifespan, así que crea su propio cliente de MongoDB (y su pool) y sus
+recursos en segundo plano; nada se comparte entre workers. Por eso el
+valor por defecto es un solo worker: con varios, /metrics y /stats
+muestran solo el worker que atiende cada petición. WEB_CONCURRENCY se
+exporta a los workers, que reparten entre ellos los pools por defecto
+(MONGODB_MAX_POOL_SIZE y, en el User Service, HASH_POOL_SIZE). Para
+desarrollo con recarga automática usar `python main.py`.
+
+La caché en memoria (CACHE_BACKEND=memory, la opción por defecto) es de
+cada worker y una escritura solo invalida la del worker que la atiende:
+con varios workers otro podría servir el documento anterior hasta que
+expire el TTL. Por eso con WEB_CONCURRENCY > 1 la caché se desactiva
+salvo que se use CACHE_BACKEND=redis, compartida por todos.
+
+Variables de entorno:
+- WEB_CONCURRENCY: número de workers (por defecto 1; como máximo, los CPUs
+  disponibles del contenedor)
+- HOST / PORT: dirección de escucha
+- UVICORN_BACKLOG: conexiones pendientes de aceptar en el socket (por defecto 2048)
+- UVICORN_LIMIT_CONCURRENCY: máximo de conexiones/peticiones concurrentes por
+  worker antes de responder 503 (0 = sin límite)
+- UVICORN_TIMEOUT_KEEP_ALIVE: segundos que se mantiene abierta una conexión
+  keep-alive inactiva (por defecto 5)
+- UVICORN_TIMEOUT_GRACEFUL_SHUTDOWN: segundos para terminar las peticiones en
+  curso al parar (por defecto 30)
+- LOG_LEVEL: nivel de log de uvicorn (por defecto info)
+
+Uso:
+    python serve.py
+    WEB_CONCURRENCY=4 UVICORN_LIMIT_CONCURRENCY=200 python serve.py
+"""
+import os
+import importlib.util
+import logging
+
+import uvicorn
+from dotenv import load_dotenv
+
+from config.settings import available_cpus, web_workers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8000
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    workers = web_workers()
+    if workers > available_cpus():
+        # Más workers que CPUs solo añade cambios de contexto y conexiones
+        logger.warning(f"⚠️ WEB_CONCURRENCY={workers} exceeds the {available_cpus()} available CPUs, using {available_cpus()}")
+        workers = available_cpus()
+    # Los workers (procesos nuevos) heredan el entorno: así reparten sus pools
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    cache_backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if workers > 1 and cache_backend == "memory":
+        # Los workers heredan el entorno: ninguno crea una caché privada
+        logger.warning("⚠️ In-memory cache disabled with multiple workers (use CACHE_BACKEND=redis to share one)")
+        os.environ["CACHE_BACKEND"] = "none"
+    limit_concurrency = int(os.getenv("UVICORN_LIMIT_CONCURRENCY", "0"))
+    # uvloop y httptools vienen con uvicorn[standard]; sin ellos, las implementaciones por defecto
+    loop = "uvloop" if _available("uvloop") else "auto"
+    http = "httptools" if _available("httptools") else "auto"
+    logger.info(f"🚀 Starting {workers} worker(s) (loop: {loop}, http: {http})")
+
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", str(DEFAULT_PORT))),
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=int(os.getenv("UVICORN_BACKLOG", "2048")),
+        limit_concurrency=limit_concurrency or None,
+        timeout_keep_alive=int(os.getenv("UVICORN_TIMEOUT_KEEP_ALIVE", "5")),
+        timeout_graceful_shutdown=int(os.getenv("UVICORN_TIMEOUT_GRACEFUL_SHUTDOWN", "30")),
+        # Sin log por petición: con varios workers es el cuello de botella (usar /metrics)
+        access_log=False,
+        # Cabeceras X-Forwarded-* de un proxy o balanceador
+        proxy_headers=True,
+        log_level=os.getenv("LOG_LEVEL", "info").lower()
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Fixtures de los tests: la aplicación en el mismo proceso contra mongomock-motor.
+
+Requiere: pip install pytest mongomock-motor httpx
+Ejecutar desde reto1_user_service/: python -m pytest tests
+"""
+import os
+import sys
+from typing import List, Tuple
+
+import pytest
+
+SERVICE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_PATH)
+
+# Operaciones de la colección que son un round trip al servidor
+COMMANDS = (
+    "insert_one", "insert_many", "find_one", "find", "find_one_and_update", "find_one_and_delete",
+    "find_one_and_replace", "update_one", "update_many", "replace_one", "delete_one", "delete_many",
+    "bulk_write", "count_documents", "aggregate",
+)
+
+
+class CommandRecorder:
+    """Registra (colección, operación) de cada comando que envía el driver"""
+
+    def __init__(self):
+        self.commands: List[Tuple[str, str]] = []
+
+    def reset(self):
+        self.commands = []
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def commands(monkeypatch) -> CommandRecorder:
+    """Espía las operaciones de todas las colecciones de mongomock-motor"""
+    from mongomock_motor import AsyncMongoMockCollection
+
+    recorder = CommandRecorder()
+    for name in COMMANDS:
+        original = getattr(AsyncMongoMockCollection, name)
+
+        def spy(self, *args, __name=name, __original=original, **kwargs):
+            recorder.commands.append((self.name, __name))
+            return __original(self, *args, **kwargs)
+
+        monkeypatch.setattr(AsyncMongoMockCollection, name, spy)
+    return recorder
+
+
+@pytest.fixture
+async def client(monkeypatch, commands):
+    """Cliente HTTP contra la aplicación (con su lifespan) sobre una base de datos en memoria"""
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient
+    import config.database as database_module
+
+    async def connect_to_fake_mongo():
+        mongo = AsyncMongoMockClient()
+        database_module.database.client = mongo
+        database_module.database.db = mongo["users_db"]
+        database_module.database.read_db = database_module.database.db
+        await database_module.ensure_indexes(database_module.database.db)
+
+    # main importa connect_to_mongo por nombre: se parchea también allí
+    monkeypatch.setattr(database_module, "connect_to_mongo", connect_to_fake_mongo)
+    import main
+    monkeypatch.setattr(main, "connect_to_mongo", connect_to_fake_mongo)
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+            commands.reset()
+            yield http_client
@@ -0,0 +1,69 @@
+"""
+Round trips a MongoDB por endpoint de escritura.
+
+Cada escritura del CRUD es exactamente un comando del driver: la respuesta
+se construye desde el documento insertado o desde find_one_and_update
+(return_document=AFTER), sin lecturas previas ni posteriores.
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+NEW_USER = {"name": "Ada Lovelace", "email": "ada@example.com", "password": "secret123"}
+MISSING_ID = "0123456789abcdef01234567"
+
+
+async def _create_user(client, commands, **overrides) -> str:
+    response = await client.post("/users/", json={**NEW_USER, **overrides})
+    assert response.status_code == 201
+    commands.reset()
+    return response.json()["_id"]
+
+
+async def test_create_user_is_one_insert(client, commands):
+    response = await client.post("/users/", json=NEW_USER)
+
+    assert response.status_code == 201
+    assert commands.commands == [("users", "insert_one")]
+
+
+async def test_create_duplicate_user_is_one_insert(client, commands):
+    await _create_user(client, commands)
+
+    response = await client.post("/users/", json=NEW_USER)
+
+    assert response.status_code == 400
+    assert commands.commands == [("users", "insert_one")]
+
+
+@pytest.mark.parametrize("update", [{"name": "Augusta Ada"}, {"password": "another123"}])
+async def test_update_user_is_one_find_one_and_update(client, commands, update):
+    user_id = await _create_user(client, commands)
+
+    response = await client.put(f"/users/{user_id}", json=update)
+
+    assert response.status_code == 200
+    assert commands.commands == [("users", "find_one_and_update")]
+
+
+async def test_update_missing_user_is_one_find_one_and_update(client, commands):
+    response = await client.put(f"/users/{MISSING_ID}", json={"name": "Nobody"})
+
+    assert response.status_code == 404
+    assert commands.commands == [("users", "find_one_and_update")]
+
+
+async def test_delete_user_is_one_delete(client, commands):
+    user_id = await _create_user(client, commands)
+
+    response = await client.delete(f"/users/{user_id}")
+
+    assert response.status_code == 204
+    assert commands.commands == [("users", "delete_one")]
+
+
+async def test_delete_missing_user_is_one_delete(client, commands):
+    response = await client.delete(f"/users/{MISSING_ID}")
+
+    assert response.status_code == 404
+    assert commands.commands == [("users", "delete_one")]
@@ -0,0 +1,229 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MessageInProgressError(Exception):
+    """El mensaje lo está procesando otro worker: se reintenta más tarde en lugar de descartarlo"""
+    pass
+
+
+class DedupStore:
+    """
+    Interfaz del registro de mensajes ya procesados.
+
+    claim() reserva la clave de forma atómica como "en curso": solo el
+    primer llamador recibe True y procesa el mensaje. Al terminar,
+    complete() la marca como procesada (las siguientes copias son
+    duplicados); si el procesamiento falla, release() la libera para que
+    el reintento pueda procesarlo. Mientras la clave está en curso,
+    claim() lanza MessageInProgressError.
+    """
+
+    def claim(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def complete(self, key: str):
+        raise NotImplementedError
+
+    def release(self, key: str):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryDedupStore(DedupStore):
+    """
+    Registro en memoria acotado: LRU con TTL por entrada (O(1), thread-safe).
+
+    Las claves en curso viven en el propio proceso, que siempre las completa
+    o las libera (si el proceso muere, el registro desaparece con él).
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._in_progress = set()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def contains(self, key: str) -> bool:
+        """True si la clave está registrada como procesada y no ha expirado"""
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: str) -> bool:
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False
+        self._entries.move_to_end(key)
+        return True
+
+    def add(self, key: str):
+        """Registra la clave como procesada"""
+        with self._lock:
+            self._in_progress.discard(key)
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def claim(self, key: str) -> bool:
+        with self._lock:
+            if self._get(key):
+                return False
+            if key in self._in_progress:
+                raise MessageInProgressError(f"Message {key} is already being processed")
+            self._in_progress.add(key)
+            return True
+
+    def complete(self, key: str):
+        self.add(key)
+
+    def release(self, key: str):
+        with self._lock:
+            self._in_progress.discard(key)
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, in_progress = len(self._entries), len(self._in_progress)
+        return {
+            "entries": entries,
+            "in_progress": in_progress,
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+
+class MongoDedupStore(DedupStore):
+    """
+    Registro compartido entre réplicas sobre MongoDB.
+
+    Cada clave es el _id de un documento en la colección (la reserva es un
+    insert_one: el índice único de _id la hace atómica) y un índice TTL
+    sobre processed_at borra las entradas antiguas. Delante hay un
+    MemoryDedupStore para descartar los duplicados recientes sin ir a la BD.
+
+    La reserva se guarda como "processing" con un plazo de
+    `processing_timeout` segundos y pasa a "done" tras procesar el mensaje.
+    Si el worker muere a mitad (SIGKILL, OOM, reinicio del supervisor), la
+    clave no queda reservada para siempre: vencido el plazo, la re-entrega
+    del broker la reclama y el mensaje se procesa.
+    """
+
+    def __init__(self, collection, ttl: float, local: MemoryDedupStore, processing_timeout: float = 30):
+        self.collection = collection
+        self.ttl = ttl
+        self.local = local
+        self.processing_timeout = processing_timeout
+        self.local_hits = 0
+        self.takeovers = 0
+        self.collection.create_index(
+            "processed_at",
+            name="processed_at_ttl",
+            expireAfterSeconds=int(ttl)
+        )
+
+    def claim(self, key: str) -> bool:
+        from pymongo.errors import DuplicateKeyError
+
+        # Duplicado reciente: se descarta sin round trip a MongoDB
+        if self.local.contains(key):
+            self.local_hits += 1
+            return False
+        now = datetime.utcnow()
+        processing_until = now + timedelta(seconds=self.processing_timeout)
+        try:
+            self.collection.insert_one({
+                "_id": key, "state": "processing", "processing_until": processing_until, "processed_at": now
+            })
+            return True
+        except DuplicateKeyError:
+            pass
+
+        # Reserva vencida de un worker que murió: se toma
+        result = self.collection.update_one(
+            {"_id": key, "state": "processing", "processing_until": {"$lt": now}},
+            {"$set": {"processing_until": processing_until, "processed_at": now}}
+        )
+        if result.modified_count:
+            self.takeovers += 1
+            logger.warning(f"⚠️ Dedup key {key} was left in progress, processing it again")
+            return True
+
+        entry = self.collection.find_one({"_id": key}, {"state": 1})
+        if entry is not None and entry.get("state") == "processing":
+            raise MessageInProgressError(f"Message {key} is already being processed")
+        # Procesado (las entradas sin state son de versiones anteriores) o
+        # borrado por el TTL entre las dos operaciones: se trata como duplicado
+        self.local.add(key)
+        return False
+
+    def complete(self, key: str):
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {"state": "done", "processed_at": datetime.utcnow()}, "$unset": {"processing_until": ""}}
+        )
+        self.local.add(key)
+
+    def release(self, key: str):
+        self.local.release(key)
+        self.collection.delete_one({"_id": key})
+
+    def stats(self) -> Dict[str, Any]:
+        return {"local_hits": self.local_hits, "takeovers": self.takeovers, **self.local.stats()}
+
+
+def build_dedup_store() -> Optional[DedupStore]:
+    """
+    Crea el registro de deduplicación según las variables de entorno.
+
+    - DEDUP_BACKEND: memory (por defecto) | mongo | none
+    - DEDUP_TTL_SECONDS: tiempo que se recuerda un mensaje (por defecto 86400)
+    - DEDUP_MAX_ENTRIES: tamaño máximo del registro en memoria (por defecto 100000)
+    - DEDUP_PROCESSING_TIMEOUT: plazo de una reserva en curso en el backend
+      mongo antes de que otra entrega pueda reclamarla (por defecto 30)
+    - MONGODB_URI / DATABASE_NAME: conexión para el backend mongo
+    """
+    backend_name = os.getenv("DEDUP_BACKEND", "memory").lower()
+    ttl = float(os.getenv("DEDUP_TTL_SECONDS", "86400"))
+    max_entries = int(os.getenv("DEDUP_MAX_ENTRIES", "100000"))
+
+    if backend_name == "none":
+        store = None
+    elif backend_name == "mongo":
+        # Dependencia opcional: solo necesaria con DEDUP_BACKEND=mongo
+        from pymongo import MongoClient
+        client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+        collection = client[os.getenv("DATABASE_NAME", "notifications_db")]["processed_messages"]
+        store = MongoDedupStore(
+            collection, ttl, MemoryDedupStore(max_entries, ttl),
+            processing_timeout=float(os.getenv("DEDUP_PROCESSING_TIMEOUT", "30"))
+        )
+    else:
+        store = MemoryDedupStore(max_entries, ttl)
+
+    logger.info(f"✅ Dedup store configured: {backend_name} (ttl: {ttl:g}s)")
+    return store
+
+
+# Instancia global (se mantiene entre reconexiones del consumer)
+dedup_store = build_dedup_store()
+
+
+def get_dedup_store() -> Optional[DedupStore]:
+    """Retorna el registro global de deduplicación (None si está desactivado)"""
+    return dedup_store
@@ -0,0 +1,63 @@
+import threading
+from bisect import bisect_left
+from typing import List, Optional, Sequence
+
+# Límites superiores (segundos) de los buckets de latencia
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias de buckets fijos (thread-safe).
+
+    observe() es O(log buckets) y no guarda las muestras; los percentiles
+    se estiman interpolando dentro del bucket (como histogram_quantile de
+    Prometheus), así que su precisión depende del ancho de los buckets.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # Conteos por bucket (+Inf al final)
+            self._counts: List[int] = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.total = 0.0
+
+    def observe(self, seconds: float):
+        position = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[position] += 1
+            self.count += 1
+            self.total += seconds
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Percentil estimado en segundos (None si no hay muestras)"""
+        with self._lock:
+            counts, count = list(self._counts), self.count
+        if not count:
+            return None
+        rank = fraction * count
+        cumulative = 0
+        for position, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if position == len(self.buckets):
+                    # Por encima del último límite no hay cota: se devuelve el límite
+                    return self.buckets[-1]
+                lower = self.buckets[position - 1] if position else 0.0
+                upper = self.buckets[position]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def summary(self) -> str:
+        """p50/p95/p99 en milisegundos para el log"""
+        if not self.count:
+            return "no samples"
+        return ", ".join(
+            f"{label} {self.quantile(fraction) * 1000:.1f}ms"
+            for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+        ) + f" ({self.count} msgs)"
@@ -1,7 +1,9 @@
+import os
 import logging
-import time
+import random
+import signal
+import threading
 from dotenv import load_dotenv
-from config.rabbit import get_rabbitmq_consumer
 
 # Configurar logging
 logging.basicConfig(
@@ -10,34 +12,72 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Cargar variables de entorno
+# Cargar variables de entorno (antes de importar los módulos que leen la configuración)
 load_dotenv()
 
+from config.rabbit import get_rabbitmq_consumer
+
+
+def reconnect_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Espera antes del reintento `attempt`: backoff exponencial con jitter
+    completo, para que varias réplicas no reconecten todas a la vez.
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
 
-def main():
+def main(stats_callback=None):
     """
     Función principal del servicio de notificaciones.
     
     Este servicio escucha la cola 'orders_queue' en RabbitMQ
     y procesa los mensajes de nuevas órdenes.
+    
+    Con SIGTERM (docker stop, o el supervisor) termina los mensajes en
+    curso, envía sus acks y cierra la conexión.
+    
+    Args:
+        stats_callback: Opcional, recibe periódicamente los incrementos de
+            los contadores del consumer (lo usa supervisor.py)
     """
     logger.info("🚀 Starting Notifications Service...")
     
-    max_retries = 5
-    retry_delay = 5  # segundos
+    stopping = threading.Event()
+    consumer = None
+    
+    def handle_sigterm(signum, frame):
+        logger.info("🛑 SIGTERM received, draining in-flight messages...")
+        stopping.set()
+        if consumer is not None:
+            consumer.request_stop()
+    
+    signal.signal(signal.SIGTERM, handle_sigterm)
     
-    for attempt in range(1, max_retries + 1):
+    # 0 = reintentar indefinidamente
+    max_retries = int(os.getenv("RABBITMQ_MAX_RETRIES", "0"))
+    base_delay = float(os.getenv("RABBITMQ_RECONNECT_DELAY", "1"))  # segundos
+    max_delay = float(os.getenv("RABBITMQ_RECONNECT_MAX_DELAY", "60"))
+    
+    attempt = 0
+    while not stopping.is_set():
         try:
             # Crear consumer
             consumer = get_rabbitmq_consumer()
+            consumer.stats_callback = stats_callback
             
             # Conectar a RabbitMQ
             consumer.connect()
             
-            # Iniciar consumo de mensajes (bloquea hasta CTRL+C)
+            # Conectado: el backoff vuelve a empezar en el próximo corte
+            attempt = 0
+            if stopping.is_set():
+                consumer.stop()
+                break
+            
+            # Iniciar consumo de mensajes (bloquea hasta CTRL+C o SIGTERM)
             consumer.start_consuming()
             
-            # Si llega aquí, fue detenido manualmente
+            # Si llega aquí, fue detenido (SIGTERM) y ya cerró la conexión
             break
             
         except KeyboardInterrupt:
@@ -45,14 +85,16 @@ def main():
             break
             
         except Exception as e:
-            logger.error(f"❌ Error in notifications service (attempt {attempt}/{max_retries}): {e}")
+            attempt += 1
+            logger.error(f"❌ Error in notifications service (attempt {attempt}): {e}")
             
-            if attempt < max_retries:
-                logger.info(f"⏳ Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
+            if max_retries and attempt >= max_retries:
                 logger.error(f"❌ Max retries reached. Service shutting down.")
                 raise
+            
+            delay = reconnect_delay(attempt, base_delay, max_delay)
+            logger.info(f"⏳ Retrying in {delay:.1f} seconds...")
+            stopping.wait(delay)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+import os
+import signal
+import logging
+import time
+import multiprocessing
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(processName)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Contadores que cada worker reporta al supervisor (mismo orden en la memoria compartida)
+STATS_FIELDS = ("processed", "failed", "retried", "dead_lettered", "duplicates")
+
+
+def _run_worker(index: int, shared_stats):
+    """
+    Punto de entrada de cada proceso worker: un consumer completo
+    (conexión, canal y pool de workers propios).
+    """
+    # CTRL+C llega a todo el grupo de procesos: el supervisor lo traduce a SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Importar aquí: cada proceso crea sus propias conexiones (nada se hereda del padre)
+    from consumer import main
+
+    offset = index * len(STATS_FIELDS)
+
+    def report(deltas: Dict[str, int]):
+        with shared_stats.get_lock():
+            for position, field in enumerate(STATS_FIELDS):
+                shared_stats[offset + position] += deltas.get(field, 0)
+
+    main(stats_callback=report)
+
+
+class WorkerSupervisor:
+    """
+    Supervisor de procesos del servicio de notificaciones.
+
+    Lanza N procesos consumer (por defecto uno por core), reinicia los que
+    terminan inesperadamente, reenvía SIGTERM/CTRL+C para un cierre
+    ordenado (cada worker termina sus mensajes en curso y envía los acks)
+    y registra el throughput agregado de todos los workers.
+    """
+
+    def __init__(self):
+        self.processes = int(os.getenv("CONSUMER_PROCESSES", str(os.cpu_count() or 1)))
+        self.stats_interval = float(os.getenv("CONSUMER_STATS_INTERVAL", "10"))
+        self.restart_delay = float(os.getenv("CONSUMER_RESTART_DELAY", "1"))
+        # Margen sobre el drain de cada worker antes de forzar el cierre
+        self.shutdown_timeout = float(os.getenv("CONSUMER_DRAIN_TIMEOUT", "30")) + 5
+
+        self._context = multiprocessing.get_context("fork")
+        self._shared_stats = self._context.Array("q", self.processes * len(STATS_FIELDS))
+        self._workers: List[Optional[multiprocessing.Process]] = [None] * self.processes
+        self._restart_at: Dict[int, float] = {}
+        self._stopping = False
+        self.restarts = 0
+
+    def _start_worker(self, index: int):
+        process = self._context.Process(
+            target=_run_worker,
+            args=(index, self._shared_stats),
+            name=f"worker-{index}",
+            daemon=False
+        )
+        process.start()
+        self._workers[index] = process
+        logger.info(f"✅ Worker {index} started (pid {process.pid})")
+
+    def _handle_signal(self, signum, frame):
+        if not self._stopping:
+            logger.info(f"🛑 Signal {signum} received, stopping {self.processes} workers...")
+        self._stopping = True
+
+    def _snapshot(self) -> List[Dict[str, int]]:
+        """Contadores acumulados de cada worker"""
+        with self._shared_stats.get_lock():
+            values = list(self._shared_stats)
+        size = len(STATS_FIELDS)
+        return [
+            dict(zip(STATS_FIELDS, values[index * size:(index + 1) * size]))
+            for index in range(self.processes)
+        ]
+
+    def _log_throughput(self, previous: List[Dict[str, int]], elapsed: float) -> List[Dict[str, int]]:
+        """Registra el throughput agregado y por worker desde el último reporte"""
+        current = self._snapshot()
+        per_worker = [now["processed"] - before["processed"] for now, before in zip(current, previous)]
+        total = sum(per_worker)
+        totals = {field: sum(worker[field] for worker in current) for field in STATS_FIELDS}
+        if total or any(now != before for now, before in zip(current, previous)):
+            logger.info(
+                f"📊 Aggregated throughput: {total / elapsed:.1f} msg/s across {self.processes} workers "
+                f"[{', '.join(f'{count / elapsed:.1f}' for count in per_worker)}] "
+                f"(total: {totals['processed']}, failed: {totals['failed']}, "
+                f"retried: {totals['retried']}, dead-lettered: {totals['dead_lettered']}, "
+                f"duplicates: {totals['duplicates']}, restarts: {self.restarts})"
+            )
+        return current
+
+    def _check_workers(self):
+        """Reinicia los workers que terminaron inesperadamente"""
+        now = time.monotonic()
+        for index, process in enumerate(self._workers):
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                logger.error(f"❌ Worker {index} (pid {process.pid}) exited with code {process.exitcode}")
+                process.close()
+                self._workers[index] = None
+                self._restart_at[index] = now + self.restart_delay
+            if self._restart_at.get(index, 0) <= now:
+                self._restart_at.pop(index, None)
+                self.restarts += 1
+                self._start_worker(index)
+
+    def _shutdown(self):
+        """Reenvía SIGTERM a los workers y espera a que terminen su drain"""
+        alive = [process for process in self._workers if process is not None and process.is_alive()]
+        for process in alive:
+            process.terminate()  # SIGTERM
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in alive:
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.error(f"❌ Worker {process.name} did not drain in time, killing it")
+                process.kill()
+                process.join()
+
+    def run(self):
+        """Bucle del supervisor (bloquea hasta SIGTERM o CTRL+C)"""
+        logger.info(f"🚀 Starting Notifications Service supervisor with {self.processes} workers...")
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        for index in range(self.processes):
+            self._start_worker(index)
+
+        previous = self._snapshot()
+        last_report = time.monotonic()
+        while not self._stopping:
+            time.sleep(0.5)
+            if self._stopping:
+                break
+            self._check_workers()
+            now = time.monotonic()
+            if now - last_report >= self.stats_interval:
+                previous = self._log_throughput(previous, now - last_report)
+                last_report = now
+
+        self._shutdown()
+        self._log_throughput(previous, max(time.monotonic() - last_report, 1e-3))
+        logger.info("✅ All workers stopped")
+
+
+if __name__ == "__main__":
+    WorkerSupervisor().run()
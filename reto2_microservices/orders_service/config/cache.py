@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """
+    Interfaz de backend de caché.
+
+    Cualquier objeto con estos métodos puede usarse como backend
+    (por ejemplo, un fake en memoria para pruebas locales).
+    """
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class LRUCache(CacheBackend):
+    """Caché en proceso con política LRU, TTL por entrada y tamaño máximo"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisCache(CacheBackend):
+    """
+    Backend compartido entre procesos/réplicas sobre Redis.
+
+    Recibe un cliente con la API de redis.asyncio (get/set/delete);
+    los valores se guardan como JSON.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self.client.set(key, json.dumps(value, default=str), px=int(ttl * 1000))
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+
+class ReadThroughCache:
+    """
+    Caché de lectura (read-through) sobre un backend intercambiable.
+
+    Si el backend falla se sirve directamente desde el loader: la caché
+    nunca debe tumbar una petición.
+
+    Cada clave con cargas en curso tiene una generación que invalidate()
+    incrementa: si la clave se invalida mientras el loader lee la base de
+    datos, el valor leído puede ser anterior a la escritura y no se guarda.
+    Las generaciones son por proceso (con Redis, una invalidación de otra
+    réplica no la detiene).
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+        self.stale_loads = 0
+        # clave -> [cargas en curso, generación] (solo claves que se están cargando)
+        self._loading: Dict[str, list] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        """Devuelve el valor cacheado o lo carga con loader (los None no se cachean)"""
+        if not self.enabled:
+            return await loader()
+
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Cache get failed for {key}: {e}")
+            return await loader()
+
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        state = self._loading.setdefault(key, [0, 0])
+        state[0] += 1
+        generation = state[1]
+        try:
+            value = await loader()
+        finally:
+            state[0] -= 1
+            if not state[0]:
+                del self._loading[key]
+
+        if value is not None and state[1] != generation:
+            # Invalidada durante la carga: el valor puede ser anterior a la escritura
+            self.stale_loads += 1
+        elif value is not None:
+            try:
+                await self.backend.set(key, value, self.ttl)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Cache set failed for {key}: {e}")
+        return value
+
+    async def invalidate(self, key: str):
+        """Elimina una entrada tras una escritura"""
+        if not self.enabled:
+            return
+        state = self._loading.get(key)
+        if state is not None:
+            state[1] += 1
+        try:
+            await self.backend.delete(key)
+            self.invalidations += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Cache invalidation failed for {key}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de la caché para monitoreo"""
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "stale_loads": self.stale_loads,
+            "errors": self.errors,
+        }
+        if self.backend:
+            stats.update(self.backend.stats())
+        return stats
+
+
+def build_cache() -> ReadThroughCache:
+    """
+    Crea la caché según las variables de entorno.
+
+    - CACHE_BACKEND: memory (por defecto) | redis | none
+    - CACHE_TTL_SECONDS: TTL de cada entrada (por defecto 60)
+    - CACHE_MAX_ENTRIES: tamaño máximo de la caché en memoria (por defecto 10000)
+    - REDIS_URL: conexión para el backend redis
+    """
+    backend_name = os.getenv("CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+
+    if backend_name == "none":
+        backend = None
+    elif backend_name == "redis":
+        # Dependencia opcional: solo necesaria con CACHE_BACKEND=redis
+        import redis.asyncio as redis
+        backend = RedisCache(redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+    else:
+        backend = LRUCache(int(os.getenv("CACHE_MAX_ENTRIES", "10000")))
+
+    logger.info(f"✅ Cache configured: {backend_name} (ttl: {ttl}s)")
+    return ReadThroughCache(backend, ttl)
+
+
+# Instancia global de la caché
+cache = build_cache()
+
+
+def get_cache() -> ReadThroughCache:
+    """Retorna la instancia global de la caché"""
+    return cache
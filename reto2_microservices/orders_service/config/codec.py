@@ -0,0 +1,232 @@
+import os
+import gzip
+import json
+import zlib
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+BSON_CONTENT_TYPE = "application/bson"
+
+# content_encoding -> (comprimir(datos, nivel), descomprimir)
+COMPRESSIONS: Dict[str, Tuple[Callable[[bytes, int], bytes], Callable[[bytes], bytes]]] = {
+    "deflate": (zlib.compress, zlib.decompress),
+    "gzip": (gzip.compress, gzip.decompress),
+}
+
+
+class UnsupportedContentTypeError(ValueError):
+    """El mensaje usa un content_type o content_encoding que este proceso no sabe decodificar"""
+    pass
+
+
+class EncodedMessage(NamedTuple):
+    """Cuerpo codificado y las propiedades AMQP que lo describen"""
+    body: bytes
+    content_type: str
+    content_encoding: Optional[str]
+
+
+class Codec:
+    """Interfaz de un formato de mensaje (identificado por su content_type)"""
+
+    name = ""
+    content_type = ""
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, body: bytes) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """
+    JSON (por defecto, el formato de siempre): los valores que JSON no
+    representa (datetime, ObjectId) se envían como texto con str().
+    """
+
+    name = "json"
+    content_type = JSON_CONTENT_TYPE
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return json.dumps(message, default=str, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, body: bytes) -> Dict[str, Any]:
+        return json.loads(body)
+
+
+class MsgpackCodec(Codec):
+    """
+    MessagePack: binario y más compacto que JSON. Los datetime viajan como
+    timestamp nativo (sin pasar por texto) y se decodifican en UTC.
+    """
+
+    name = "msgpack"
+    content_type = MSGPACK_CONTENT_TYPE
+
+    def __init__(self):
+        # Dependencia opcional: solo necesaria para codificar o recibir msgpack
+        import msgpack
+        self._msgpack = msgpack
+
+    def _default(self, value: Any) -> Any:
+        if isinstance(value, datetime):
+            # Los datetime naive del servicio están en UTC
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return self._msgpack.Timestamp.from_datetime(value)
+        return str(value)
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return self._msgpack.packb(message, default=self._default, use_bin_type=True)
+
+    def decode(self, body: bytes) -> Dict[str, Any]:
+        return self._msgpack.unpackb(body, raw=False, timestamp=3)
+
+
+class BsonCodec(Codec):
+    """
+    BSON (el formato de MongoDB): datetime y ObjectId nativos, que se
+    decodifican como datetime en UTC y ObjectId.
+    """
+
+    name = "bson"
+    content_type = BSON_CONTENT_TYPE
+
+    def __init__(self):
+        # Dependencia opcional: bson viene con pymongo
+        import bson
+        from bson.codec_options import CodecOptions, TypeRegistry
+        self._bson = bson
+        self._options = CodecOptions(
+            tz_aware=True,
+            tzinfo=timezone.utc,
+            type_registry=TypeRegistry(fallback_encoder=str)
+        )
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return self._bson.encode(message, codec_options=self._options)
+
+    def decode(self, body: bytes) -> Dict[str, Any]:
+        return self._bson.decode(body, codec_options=self._options)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec, MsgpackCodec, BsonCodec)}
+
+# content_type -> codec (también los alias habituales)
+CONTENT_TYPES = {
+    JSON_CONTENT_TYPE: "json",
+    MSGPACK_CONTENT_TYPE: "msgpack",
+    "application/x-msgpack": "msgpack",
+    BSON_CONTENT_TYPE: "bson",
+}
+
+
+class MessageCodec:
+    """
+    Codifica los mensajes con el formato configurado y decodifica cualquier
+    formato conocido según las propiedades AMQP del mensaje.
+
+    El formato viaja en `content_type` y la compresión en `content_encoding`,
+    así que productores y consumidores con configuraciones distintas
+    conviven: un consumer decodifica JSON, msgpack o BSON (comprimidos o
+    no) sin importar cómo esté configurado. Los mensajes sin content_type
+    se tratan como JSON.
+
+    Solo se comprimen los cuerpos de al menos `compression_min_bytes`: en
+    mensajes pequeños la cabecera de compresión ocupa más de lo que ahorra.
+    """
+
+    def __init__(
+        self,
+        codec_name: str = "json",
+        compression: Optional[str] = None,
+        compression_min_bytes: int = 1024,
+        compression_level: int = 6
+    ):
+        if codec_name not in CODECS:
+            raise ValueError(f"Unknown message codec '{codec_name}' (expected one of: {', '.join(CODECS)})")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(
+                f"Unknown message compression '{compression}' (expected one of: none, {', '.join(COMPRESSIONS)})"
+            )
+        self.codec = CODECS[codec_name]()
+        self.compression = compression
+        self.compression_min_bytes = compression_min_bytes
+        self.compression_level = compression_level
+        self._decoders: Dict[str, Codec] = {self.codec.name: self.codec}
+
+    def encode(self, message: Dict[str, Any]) -> EncodedMessage:
+        body = self.codec.encode(message)
+        if self.compression is not None and len(body) >= self.compression_min_bytes:
+            compress, _ = COMPRESSIONS[self.compression]
+            return EncodedMessage(compress(body, self.compression_level), self.codec.content_type, self.compression)
+        return EncodedMessage(body, self.codec.content_type, None)
+
+    def decode(self, body: bytes, content_type: Optional[str], content_encoding: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Decodifica un mensaje según sus propiedades AMQP.
+
+        Raises:
+            UnsupportedContentTypeError: formato o compresión desconocidos (o
+                sin la dependencia instalada)
+        """
+        if content_encoding:
+            if content_encoding not in COMPRESSIONS:
+                raise UnsupportedContentTypeError(f"Unsupported content encoding '{content_encoding}'")
+            _, decompress = COMPRESSIONS[content_encoding]
+            body = decompress(body)
+        return self._decoder(content_type).decode(body)
+
+    def _decoder(self, content_type: Optional[str]) -> Codec:
+        # Sin content_type: productores antiguos, que siempre enviaban JSON
+        name = CONTENT_TYPES.get((content_type or JSON_CONTENT_TYPE).split(";")[0].strip().lower())
+        if name is None:
+            raise UnsupportedContentTypeError(f"Unsupported content type '{content_type}'")
+        decoder = self._decoders.get(name)
+        if decoder is None:
+            try:
+                decoder = self._decoders[name] = CODECS[name]()
+            except ImportError as e:
+                raise UnsupportedContentTypeError(f"Cannot decode '{content_type}': {e}") from e
+        return decoder
+
+    def describe(self) -> str:
+        """Resumen para el log de arranque"""
+        if self.compression is None:
+            return f"{self.codec.name}, no compression"
+        return f"{self.codec.name}, {self.compression} >= {self.compression_min_bytes} bytes"
+
+
+def build_message_codec() -> MessageCodec:
+    """
+    Crea el codec de mensajes según las variables de entorno.
+
+    - MESSAGE_CODEC: json (por defecto) | msgpack | bson
+    - MESSAGE_COMPRESSION: none (por defecto) | deflate | gzip
+    - MESSAGE_COMPRESSION_MIN_BYTES: tamaño mínimo a comprimir (por defecto 1024)
+    - MESSAGE_COMPRESSION_LEVEL: nivel de compresión 1-9 (por defecto 6)
+    """
+    compression = os.getenv("MESSAGE_COMPRESSION", "none").lower()
+    codec = MessageCodec(
+        codec_name=os.getenv("MESSAGE_CODEC", "json").lower(),
+        compression=None if compression == "none" else compression,
+        compression_min_bytes=int(os.getenv("MESSAGE_COMPRESSION_MIN_BYTES", "1024")),
+        compression_level=int(os.getenv("MESSAGE_COMPRESSION_LEVEL", "6"))
+    )
+    logger.info(f"✅ Message codec configured: {codec.describe()}")
+    return codec
+
+
+# Instancia global del codec
+message_codec = build_message_codec()
+
+
+def get_message_codec() -> MessageCodec:
+    """Retorna la instancia global del codec de mensajes"""
+    return message_codec
@@ -0,0 +1,268 @@
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from config.database import get_database
+from config.metrics import get_metrics
+from config.rabbit import get_rabbitmq_publisher, PublishBufferFullError
+from config.tracing import get_trace_id, event_headers
+
+logger = logging.getLogger(__name__)
+
+
+def new_outbox_event(event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Crea un evento de outbox para guardarlo dentro del documento de la orden.
+
+    El evento se escribe en la misma operación que la orden (insert o update
+    de un solo documento, atómico en MongoDB sin necesidad de transacciones),
+    así que nunca hay una orden sin su evento ni un evento sin su orden.
+    El evento guarda la traza de la petición que lo creó, que el relay
+    envía en las cabeceras del mensaje.
+    """
+    return {
+        "event_id": str(ObjectId()),
+        "type": event_type,
+        "created_at": datetime.utcnow(),
+        "trace_id": get_trace_id(),
+        "payload": payload
+    }
+
+
+def outbox_fields(*events: Dict[str, Any]) -> Dict[str, Any]:
+    """Campos de outbox para un documento de orden nuevo"""
+    return {
+        "pending_events": list(events),
+        "outbox_pending": True
+    }
+
+
+class OutboxRelay:
+    """
+    Relay en segundo plano que publica los eventos pendientes del outbox.
+
+    Reclama lotes de órdenes con eventos pendientes mediante un lease
+    (varios workers/réplicas pueden ejecutar el relay sin pisarse),
+    publica los eventos con confirmación del broker y solo entonces los
+    marca como enviados. Si algo falla, el evento sigue pendiente y la
+    orden conserva el lease, así que se reintenta cuando expire (y el
+    relay espera con backoff antes del siguiente lote): la entrega es
+    at-least-once.
+    """
+
+    def __init__(self):
+        self.batch_size = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+        self.poll_interval = float(os.getenv("OUTBOX_POLL_INTERVAL_MS", "500")) / 1000
+        self.lease_seconds = float(os.getenv("OUTBOX_LEASE_SECONDS", "30"))
+        self.confirm_timeout = float(os.getenv("OUTBOX_CONFIRM_TIMEOUT", "10"))
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+        self.published = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_lag_ms = 0.0
+        # Órdenes del último lote con eventos sin confirmar
+        self.last_batch_retries = 0
+
+    def start(self):
+        """Arranca la tarea del relay en el event loop actual"""
+        if self._task is None:
+            self._running = True
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="outbox-relay")
+            logger.info("✅ Outbox relay started")
+
+    async def stop(self):
+        """Detiene el relay dejando terminar el lote en curso"""
+        if self._task is None:
+            return
+        self._running = False
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=self.confirm_timeout + 5)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        logger.info("✅ Outbox relay stopped")
+
+    def notify(self):
+        """Avisa al relay de que hay eventos nuevos (evita esperar al siguiente sondeo)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas del relay"""
+        return {
+            "running": self._task is not None,
+            "published": self.published,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_retries": self.last_batch_retries,
+            "last_lag_ms": self.last_lag_ms,
+        }
+
+    async def _run(self):
+        failures = 0
+        while self._running:
+            try:
+                processed = await self.relay_once()
+                failed = self.last_batch_retries > 0
+            except Exception as e:
+                logger.error(f"❌ Outbox relay error: {e}")
+                processed, failed = 0, True
+
+            if failed:
+                # Nacks, timeouts o buffer lleno: esperar con backoff (ignorando
+                # los avisos de órdenes nuevas) para no insistir contra el broker
+                failures += 1
+                await self._sleep(min(self.poll_interval * 2 ** (failures - 1), self.lease_seconds), until_notified=False)
+                continue
+            failures = 0
+
+            # Lote completo: seguir sin esperar; si no, dormir hasta el aviso o el sondeo
+            if processed < self.batch_size:
+                await self._sleep(self.poll_interval, until_notified=True)
+
+    async def _sleep(self, seconds: float, until_notified: bool):
+        """Espera `seconds` o hasta stop() (y, si until_notified, hasta un aviso de notify())"""
+        deadline = asyncio.get_running_loop().time() + seconds
+        while self._running:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return
+            self._wakeup.clear()
+            if until_notified:
+                return
+
+    async def _claim_batch(self, db) -> List[Dict[str, Any]]:
+        """Reclama hasta batch_size órdenes con eventos pendientes (lease)"""
+        now = datetime.utcnow()
+        claimable = {
+            "outbox_pending": True,
+            "$or": [
+                {"outbox_lease_until": {"$exists": False}},
+                {"outbox_lease_until": {"$lt": now}}
+            ]
+        }
+
+        candidates = await db.orders.find(claimable, {"_id": 1}).limit(self.batch_size).to_list(length=self.batch_size)
+        if not candidates:
+            return []
+
+        token = uuid.uuid4().hex
+        ids = [doc["_id"] for doc in candidates]
+        await db.orders.update_many(
+            {"_id": {"$in": ids}, **claimable},
+            {"$set": {
+                "outbox_lease_token": token,
+                "outbox_lease_until": now + timedelta(seconds=self.lease_seconds)
+            }}
+        )
+
+        return await db.orders.find(
+            {"_id": {"$in": ids}, "outbox_lease_token": token},
+            {"pending_events": 1, "outbox_lease_token": 1}
+        ).to_list(length=self.batch_size)
+
+    async def relay_once(self) -> int:
+        """Publica un lote de eventos pendientes. Retorna el número de órdenes procesadas."""
+        publisher = get_rabbitmq_publisher()
+        if not publisher.is_connected:
+            # Sin broker no se reclama nada: los eventos esperan en MongoDB, no en memoria
+            return 0
+
+        db = get_database()
+        self.last_batch_retries = 0
+        docs = await self._claim_batch(db)
+        if not docs:
+            return 0
+
+        pending = []
+        try:
+            for doc in docs:
+                for event in doc.get("pending_events", []):
+                    future = publisher.publish(
+                        event["payload"],
+                        message_id=event["event_id"],
+                        message_type=event["type"],
+                        headers=event_headers(event)
+                    )
+                    pending.append((doc, event, asyncio.wrap_future(future)))
+        except PublishBufferFullError as e:
+            # El resto queda pendiente: sus órdenes conservan el lease y se reintentan cuando expire
+            logger.warning(f"⚠️ Outbox relay paused: {e}")
+
+        # Esperar las confirmaciones del broker (todo el lote en vuelo a la vez)
+        results = []
+        if pending:
+            done, not_done = await asyncio.wait([future for _, _, future in pending], timeout=self.confirm_timeout)
+            for future in not_done:
+                future.cancel()
+            results = [future in done and not future.exception() for _, _, future in pending]
+
+        # Marcar como enviados solo los eventos confirmados
+        sent: Dict[ObjectId, List[str]] = {}
+        oldest = None
+        for (doc, event, _), ok in zip(pending, results):
+            if ok:
+                sent.setdefault(doc["_id"], []).append(event["event_id"])
+                oldest = min(oldest, event["created_at"]) if oldest else event["created_at"]
+                self.published += 1
+            else:
+                self.failed += 1
+
+        # Las órdenes con todo confirmado liberan el lease; las que tienen eventos
+        # sin confirmar lo conservan para no reintentarlos hasta que expire
+        operations = []
+        for doc in docs:
+            update: Dict[str, Any] = {"$pull": {"pending_events": {"event_id": {"$in": sent.get(doc["_id"], [])}}}}
+            if len(sent.get(doc["_id"], [])) < len(doc.get("pending_events", [])):
+                self.last_batch_retries += 1
+            else:
+                update["$unset"] = {"outbox_lease_token": "", "outbox_lease_until": ""}
+            operations.append(UpdateOne({"_id": doc["_id"], "outbox_lease_token": doc["outbox_lease_token"]}, update))
+        await db.orders.bulk_write(operations, ordered=False)
+
+        # Las órdenes sin eventos pendientes salen del índice del outbox
+        await db.orders.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in docs]}, "pending_events": {"$size": 0}},
+            {"$unset": {"outbox_pending": ""}}
+        )
+
+        self.batches += 1
+        if oldest is not None:
+            self.last_lag_ms = (datetime.utcnow() - oldest).total_seconds() * 1000
+        if self.last_batch_retries:
+            logger.warning(
+                f"⚠️ Outbox relay published {sum(results)} events, {self.last_batch_retries} orders "
+                f"will be retried when their lease expires ({self.lease_seconds:.0f}s)"
+            )
+        else:
+            logger.info(f"✅ Outbox relay published {len(pending)} events")
+        return len(docs)
+
+
+# Instancia global del relay
+outbox_relay = OutboxRelay()
+
+# Retraso del relay, calculado al exponer /metrics
+get_metrics().gauge(
+    "outbox_relay_lag_seconds",
+    "Age of the oldest event in the last batch published by the outbox relay"
+).set_function(lambda: outbox_relay.last_lag_ms / 1000)
+
+
+def get_outbox_relay() -> OutboxRelay:
+    """Retorna la instancia global del relay"""
+    return outbox_relay
@@ -0,0 +1,238 @@
+import os
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from config.database import get_database
+
+logger = logging.getLogger(__name__)
+
+STATS_COLLECTION = "order_stats"
+
+
+def _bucket_id(day: str, product_name: str) -> str:
+    """_id de un bucket: un documento por día (UTC) y producto"""
+    return f"{day}|{product_name}"
+
+
+class OrderStats:
+    """
+    Agregados precalculados de órdenes por día y producto.
+
+    Cada bucket guarda el número de órdenes, la cantidad total y las
+    órdenes por estado, y se actualiza con upserts `$inc` al crear una
+    orden o cambiar su estado. Las consultas leen solo los buckets del
+    rango pedido en lugar de recorrer la colección de órdenes.
+
+    Con el flusher en marcha (start()), los incrementos no se escriben en
+    la petición: se acumulan en memoria por bucket y una tarea en segundo
+    plano los escribe cada ORDER_STATS_FLUSH_INTERVAL_MS con un único
+    bulk_write. Así crear una orden o cambiar su estado es un solo round
+    trip a MongoDB y los buckets calientes reciben un upsert por
+    intervalo, no uno por orden; a cambio, GET /orders/stats va hasta un
+    intervalo por detrás. Sin el flusher (scripts) se escriben al momento.
+
+    Los contadores no se escriben en la misma operación que la orden: si
+    una escritura falla se reintenta en el siguiente intervalo, y si el
+    proceso muere con incrementos pendientes el bucket queda desfasado
+    hasta el siguiente rebuild() (script rebuild_stats.py).
+    """
+
+    def __init__(self, collection_name: str = STATS_COLLECTION):
+        self.collection_name = collection_name
+        self.flush_interval = float(os.getenv("ORDER_STATS_FLUSH_INTERVAL_MS", "1000")) / 1000
+        # _id del bucket -> {"day", "product_name", "inc"} pendientes de escribir
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def start(self):
+        """Arranca la tarea que escribe los incrementos acumulados"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="order-stats-flusher")
+            logger.info(f"✅ Order stats flusher started (interval: {self.flush_interval * 1000:g}ms)")
+
+    async def stop(self):
+        """Detiene la tarea y escribe lo pendiente"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush(get_database())
+        logger.info("✅ Order stats flusher stopped")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush(get_database())
+            except Exception as e:
+                logger.error(f"❌ Order stats flusher error: {e}")
+
+    def _add(self, increments: Dict[str, Dict[str, Any]], day: str, product_name: str, inc: Dict[str, int]):
+        """Suma `inc` al bucket (día, producto) de `increments`"""
+        key = _bucket_id(day, product_name)
+        bucket = increments.get(key)
+        if bucket is None:
+            bucket = increments[key] = {"day": day, "product_name": product_name, "inc": {}}
+        for field, value in inc.items():
+            bucket["inc"][field] = bucket["inc"].get(field, 0) + value
+
+    async def _record(self, db, increments: Dict[str, Dict[str, Any]]):
+        """Acumula los incrementos (flusher en marcha) o los escribe al momento"""
+        if not increments:
+            return
+        if self._task is not None:
+            for bucket in increments.values():
+                self._add(self._pending, bucket["day"], bucket["product_name"], bucket["inc"])
+            return
+        await self._write(db, increments)
+
+    async def _write(self, db, increments: Dict[str, Dict[str, Any]]) -> bool:
+        operations = [
+            UpdateOne(
+                {"_id": key},
+                {
+                    "$setOnInsert": {"day": bucket["day"], "product_name": bucket["product_name"]},
+                    "$inc": bucket["inc"]
+                },
+                upsert=True
+            )
+            for key, bucket in increments.items()
+        ]
+        try:
+            await db[self.collection_name].bulk_write(operations, ordered=False)
+            return True
+        except Exception as e:
+            self.flush_errors += 1
+            logger.warning(f"⚠️ Order stats update failed for {len(operations)} buckets: {e}")
+            return False
+
+    async def flush(self, db):
+        """Escribe los incrementos pendientes en un bulk_write (si falla, se reintentan después)"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        if await self._write(db, pending):
+            self.flushes += 1
+            return
+        # Se devuelven al buffer, sumados a lo que llegó mientras tanto
+        for bucket in pending.values():
+            self._add(self._pending, bucket["day"], bucket["product_name"], bucket["inc"])
+
+    async def record_created(self, db, orders: Iterable[Dict[str, Any]]):
+        """
+        Suma órdenes nuevas a sus buckets. Los incrementos se agrupan antes
+        por bucket: un bloque de la creación masiva genera un upsert por
+        día y producto, no uno por orden.
+        """
+        increments: Dict[str, Dict[str, Any]] = {}
+        for order in orders:
+            self._add(increments, order["created_at"].strftime("%Y-%m-%d"), order["product_name"], {
+                "orders": 1,
+                "quantity": order["quantity"],
+                f"by_status.{order.get('status', 'pending')}": 1
+            })
+        await self._record(db, increments)
+
+    async def record_status_change(self, db, order: Dict[str, Any], previous_status: str, new_status: str):
+        """Mueve una orden de un estado a otro dentro de su bucket"""
+        increments: Dict[str, Dict[str, Any]] = {}
+        self._add(increments, order["created_at"].strftime("%Y-%m-%d"), order["product_name"], {
+            f"by_status.{previous_status}": -1,
+            f"by_status.{new_status}": 1
+        })
+        await self._record(db, increments)
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas del flusher"""
+        return {
+            "running": self._task is not None,
+            "pending_buckets": len(self._pending),
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+        }
+
+    async def query(
+        self,
+        db,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        product_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Buckets del rango [since, until] (días UTC), ordenados por día y producto"""
+        query: Dict[str, Any] = {}
+        if since or until:
+            query["day"] = {}
+            if since:
+                query["day"]["$gte"] = since.isoformat()
+            if until:
+                query["day"]["$lte"] = until.isoformat()
+        if product_name:
+            query["product_name"] = product_name
+
+        cursor = db[self.collection_name].find(query, {"_id": 0}).sort([("day", 1), ("product_name", 1)])
+        return await cursor.to_list(length=None)
+
+    async def rebuild(self, db) -> int:
+        """
+        Recalcula todos los buckets desde la colección de órdenes con un
+        pipeline de agregación y reemplaza la colección con `$out`
+        (el reemplazo es atómico y conserva los índices).
+
+        Los incrementos que lleguen mientras se ejecuta el pipeline pueden
+        perderse: conviene lanzarlo con poco tráfico.
+
+        Returns:
+            Número de buckets generados
+        """
+        started = datetime.utcnow()
+        pipeline = [
+            {"$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                    "product_name": "$product_name",
+                    "status": {"$ifNull": ["$status", "pending"]}
+                },
+                "orders": {"$sum": 1},
+                "quantity": {"$sum": "$quantity"}
+            }},
+            {"$group": {
+                "_id": {"day": "$_id.day", "product_name": "$_id.product_name"},
+                "orders": {"$sum": "$orders"},
+                "quantity": {"$sum": "$quantity"},
+                "by_status": {"$push": {"k": "$_id.status", "v": "$orders"}}
+            }},
+            {"$project": {
+                "_id": {"$concat": ["$_id.day", "|", "$_id.product_name"]},
+                "day": "$_id.day",
+                "product_name": "$_id.product_name",
+                "orders": 1,
+                "quantity": 1,
+                "by_status": {"$arrayToObject": "$by_status"}
+            }},
+            {"$out": self.collection_name}
+        ]
+        await db.orders.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+
+        buckets = await db[self.collection_name].count_documents({})
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        logger.info(f"✅ Order stats rebuilt: {buckets} buckets in {elapsed:.2f}s")
+        return buckets
+
+
+# Instancia global de los agregados
+order_stats = OrderStats()
+
+
+def get_order_stats() -> OrderStats:
+    """Retorna la instancia global de los agregados de órdenes"""
+    return order_stats
@@ -0,0 +1,79 @@
+import re
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# Cabecera HTTP y AMQP con el identificador de traza (correlation id)
+TRACE_HEADER = "x-trace-id"
+# Cabeceras AMQP con marcas de tiempo (milisegundos desde epoch, UTC):
+# cuándo se creó el evento (en la petición HTTP) y cuándo se publicó
+CREATED_AT_HEADER = "x-created-at"
+PUBLISHED_AT_HEADER = "x-published-at"
+
+# IDs aceptados de la cabecera entrante (el resto se sustituye por uno nuevo)
+_VALID_TRACE_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Traza de la petición en curso (cada petición corre en su propio contexto)
+_current_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def get_trace_id() -> Optional[str]:
+    """Traza de la petición en curso (None fuera de una petición HTTP)"""
+    return _current_trace_id.get()
+
+
+def epoch_ms(moment: datetime) -> int:
+    """Milisegundos desde epoch de un datetime naive en UTC (como created_at)"""
+    return int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def event_headers(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Cabeceras AMQP de un evento del outbox: su traza y cuándo se creó"""
+    headers: Dict[str, Any] = {CREATED_AT_HEADER: epoch_ms(event["created_at"])}
+    if event.get("trace_id"):
+        headers[TRACE_HEADER] = event["trace_id"]
+    return headers
+
+
+class TraceMiddleware:
+    """
+    Middleware ASGI que asigna un identificador de traza a cada petición.
+
+    Reutiliza el X-Trace-Id entrante (p. ej. de un gateway) o genera uno
+    nuevo, lo deja en un ContextVar para que las rutas lo guarden en la
+    orden y en sus eventos, y lo devuelve en la cabecera de la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = None
+        for name, value in scope.get("headers", []):
+            if name == TRACE_HEADER.encode():
+                trace_id = value.decode("latin-1")
+                break
+        if trace_id is None or not _VALID_TRACE_ID.match(trace_id):
+            trace_id = new_trace_id()
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (TRACE_HEADER.encode(), trace_id.encode())
+                ]
+            await send(message)
+
+        token = _current_trace_id.set(trace_id)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            _current_trace_id.reset(token)
@@ -1,14 +1,11 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-import time
+import asyncio
 import logging
 from dotenv import load_dotenv
 
-from config.database import connect_to_mongo, close_mongo_connection
-from config.rabbit import get_rabbitmq_publisher
-from routes.orders import router as orders_router
-
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -16,9 +13,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Cargar variables de entorno
+# Cargar variables de entorno (antes de importar los módulos que leen la configuración)
 load_dotenv()
 
+from config.database import connect_to_mongo, close_mongo_connection
+from config.rabbit import get_rabbitmq_publisher
+from config.cache import get_cache
+from config.outbox import get_outbox_relay
+from config.stats import get_order_stats
+from config.metrics import get_metrics, MetricsMiddleware
+from config.tracing import TraceMiddleware
+from routes.orders import router as orders_router
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -30,26 +36,35 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Starting Orders Service...")
     await connect_to_mongo()
     
-    # Conectar a RabbitMQ
-    try:
-        publisher = get_rabbitmq_publisher()
-        publisher.connect()
-    except Exception as e:
-        logger.error(f"⚠️ Could not connect to RabbitMQ on startup: {e}")
-        logger.warning("Service will start but messages won't be published until RabbitMQ is available")
+    # Arrancar el publisher de RabbitMQ (conecta en segundo plano y reintenta solo;
+    # los mensajes se acumulan en el buffer hasta que haya conexión)
+    get_rabbitmq_publisher().start()
+    
+    # Relay del outbox: publica los eventos guardados junto a las órdenes
+    get_outbox_relay().start()
+    
+    # Escritura periódica de los agregados de order_stats (fuera de las peticiones)
+    get_order_stats().start()
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Orders Service...")
-    await close_mongo_connection()
     
-    # Cerrar conexión RabbitMQ
+    # Terminar el lote en curso del relay (lo no confirmado se publica al reiniciar)
+    await get_outbox_relay().stop()
+    
+    # Escribir los incrementos de order_stats pendientes
+    await get_order_stats().stop()
+    
+    # Publicar lo pendiente y cerrar conexión RabbitMQ (sin bloquear el event loop)
     try:
         publisher = get_rabbitmq_publisher()
-        publisher.close()
+        await asyncio.to_thread(publisher.close)
     except Exception as e:
         logger.error(f"Error closing RabbitMQ connection: {e}")
+    
+    await close_mongo_connection()
 
 
 # Crear aplicación FastAPI
@@ -70,31 +85,11 @@ app.add_middleware(
 )
 
 
-# Middleware para medir tiempo de respuesta
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """
-    Middleware que registra el tiempo de respuesta de cada petición.
-    """
-    start_time = time.time()
-    
-    # Procesar la petición
-    response = await call_next(request)
-    
-    # Calcular tiempo de ejecución
-    process_time = (time.time() - start_time) * 1000  # Convertir a milisegundos
-    
-    # Logging detallado
-    logger.info(
-        f"📊 {request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.2f}ms"
-    )
-    
-    # Agregar header con el tiempo de respuesta
-    response.headers["X-Process-Time"] = f"{process_time:.2f}ms"
-    
-    return response
+# Métricas de latencia por ruta (sustituye al log de cada petición; ver REQUEST_LOG_SAMPLE_RATE)
+app.add_middleware(MetricsMiddleware)
+
+# Traza (X-Trace-Id) de cada petición: se guarda en la orden y viaja en los mensajes
+app.add_middleware(TraceMiddleware)
 
 
 # Incluir rutas
@@ -120,12 +115,29 @@ async def health_check():
     }
 
 
+@app.get("/stats", tags=["Health"])
+async def stats():
+    """Métricas internas del servicio (caché, publisher de RabbitMQ, outbox y order_stats)"""
+    return {
+        "cache": get_cache().stats(),
+        "publisher": get_rabbitmq_publisher().stats(),
+        "outbox": get_outbox_relay().stats(),
+        "order_stats": get_order_stats().stats()
+    }
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Métricas en formato de exposición de texto de Prometheus"""
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
-        port=8001,
+        port=8002,
         reload=True,
         log_level="info"
     )
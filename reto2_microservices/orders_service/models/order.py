@@ -1,6 +1,6 @@
 from bson import ObjectId
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 
 
@@ -21,6 +21,18 @@ class PyObjectId(ObjectId):
         return {"type": "string"}
 
 
+# Transiciones de estado permitidas: estado actual -> estados siguientes
+ORDER_STATUS_TRANSITIONS: Dict[str, List[str]] = {
+    "pending": ["confirmed", "cancelled"],
+    "confirmed": ["shipped", "cancelled"],
+    "shipped": ["delivered"],
+    "delivered": [],
+    "cancelled": [],
+}
+
+OrderStatus = Literal["pending", "confirmed", "shipped", "delivered", "cancelled"]
+
+
 class OrderBase(BaseModel):
     """Base order model"""
     product_name: str = Field(..., min_length=1, max_length=200, description="Name of the product")
@@ -53,6 +65,50 @@ class OrderResponse(OrderBase):
         }
 
 
+class OrderStatusUpdate(BaseModel):
+    """Model for an order status transition"""
+    status: OrderStatus = Field(..., description="New status of the order")
+
+
+class BulkOrderResult(BaseModel):
+    """Result of a single row in a bulk order creation"""
+    index: int = Field(..., description="Position of the row in the request body")
+    status: str = Field(..., description="created | invalid | error")
+    id: Optional[str] = Field(None, description="ID of the created order")
+    error: Optional[str] = Field(None, description="Reason why the row was not created")
+
+
+class BulkOrderResponse(BaseModel):
+    """Model for the bulk order creation report"""
+    created: int = Field(..., description="Number of orders created")
+    invalid: int = Field(..., description="Rows that failed validation")
+    errors: int = Field(..., description="Rows that failed for other reasons")
+    results: List[BulkOrderResult] = Field(..., description="Per-row results, in request order")
+
+
+class OrderListResponse(BaseModel):
+    """Model for a page of orders"""
+    orders: List[OrderResponse] = Field(..., description="Orders in this page, newest first")
+    next_cursor: Optional[str] = Field(None, description="Value for `after` to fetch the next page (null on the last page)")
+
+
+class OrderStatsBucket(BaseModel):
+    """Precomputed counters for one product on one day (UTC)"""
+    day: str = Field(..., description="Day (YYYY-MM-DD, UTC)")
+    product_name: str = Field(..., description="Name of the product")
+    orders: int = Field(0, description="Number of orders")
+    quantity: int = Field(0, description="Total quantity ordered")
+    by_status: Dict[str, int] = Field(default_factory=dict, description="Number of orders per status")
+
+
+class OrderStatsResponse(BaseModel):
+    """Model for the order analytics response"""
+    orders: int = Field(..., description="Number of orders in the range")
+    quantity: int = Field(..., description="Total quantity in the range")
+    by_status: Dict[str, int] = Field(..., description="Number of orders per status in the range")
+    buckets: List[OrderStatsBucket] = Field(..., description="Per day and product counters")
+
+
 class OrderInDB(OrderBase):
     """Model for order stored in database"""
     id: Optional[PyObjectId] = Field(default=None, alias="_id")
@@ -0,0 +1,35 @@
+import asyncio
+import logging
+from dotenv import load_dotenv
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Cargar variables de entorno
+load_dotenv()
+
+from config.database import connect_to_mongo, close_mongo_connection, get_database
+from config.stats import get_order_stats
+
+
+async def main():
+    """
+    Recalcula desde cero los agregados de `GET /orders/stats` a partir de
+    la colección de órdenes (p. ej. tras una caída que dejó contadores
+    desfasados o al desplegar por primera vez sobre datos existentes).
+
+    Uso: python rebuild_stats.py
+    """
+    await connect_to_mongo()
+    try:
+        await get_order_stats().rebuild(get_database())
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,15 +1,98 @@
-from fastapi import APIRouter, HTTPException, status
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from datetime import date, datetime, timezone
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import os
+import json
+import base64
 import logging
 
-from models.order import OrderCreate, OrderResponse
-from config.database import get_database
-from config.rabbit import get_rabbitmq_publisher
+from models.order import (
+    OrderCreate, OrderResponse, OrderListResponse, OrderStatusUpdate,
+    OrderStatsBucket, OrderStatsResponse,
+    BulkOrderResult, BulkOrderResponse, ORDER_STATUS_TRANSITIONS
+)
+from config.database import get_database, get_read_database
+from config.cache import get_cache
+from config.outbox import get_outbox_relay, new_outbox_event, outbox_fields
+from config.stats import get_order_stats
+from config.responses import ModelResponse
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+# Campos públicos de una orden (lo que se devuelve y se cachea)
+ORDER_PUBLIC_PROJECTION = {
+    "product_name": 1,
+    "quantity": 1,
+    "customer_email": 1,
+    "created_at": 1,
+    "status": 1
+}
+
+# Tamaño de cada bloque de insert_many en la creación masiva
+BULK_CHUNK_SIZE = int(os.getenv("ORDERS_BULK_CHUNK_SIZE", "500"))
+
+# Tamaño de página del listado de órdenes
+LIST_DEFAULT_LIMIT = int(os.getenv("ORDERS_LIST_DEFAULT_LIMIT", "20"))
+LIST_MAX_LIMIT = int(os.getenv("ORDERS_LIST_MAX_LIMIT", "100"))
+
+# Orden del listado: coincide con los índices customer_email_created_at y created_at
+LIST_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+
+def _order_cache_key(order_id: str) -> str:
+    """Clave de caché de una orden"""
+    return f"order:{order_id}"
+
+
+def _utcnow_ms() -> datetime:
+    """
+    Fecha actual truncada a milisegundos (precisión de BSON), para que la
+    respuesta construida sin releer coincida con lo guardado en MongoDB.
+    """
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def _order_response(order: Dict[str, Any]) -> OrderResponse:
+    """
+    OrderResponse a partir de un documento creado por este servicio o leído
+    de MongoDB (tipos ya correctos), sin volver a validarlo.
+    """
+    return OrderResponse.model_construct(
+        id=str(order["_id"]),
+        product_name=order["product_name"],
+        quantity=order["quantity"],
+        customer_email=order["customer_email"],
+        created_at=order["created_at"],
+        status=order.get("status", "pending")
+    )
+
+
+def _new_order_document(order: OrderCreate) -> Dict[str, Any]:
+    """
+    Crea el documento de una orden nueva con su evento `order.created`.
+
+    El _id se genera aquí para incluirlo en el evento, y el evento viaja en
+    el mismo documento (outbox): orden y evento se guardan de forma atómica.
+    La orden guarda la traza de la petición (no forma parte de la respuesta).
+    """
+    order_dict = {
+        "_id": ObjectId(),
+        "product_name": order.product_name,
+        "quantity": order.quantity,
+        "customer_email": order.customer_email,
+        "created_at": _utcnow_ms(),
+        "status": "pending"
+    }
+    event = new_outbox_event("order.created", {**order_dict, "_id": str(order_dict["_id"])})
+    return {**order_dict, "trace_id": event["trace_id"], **outbox_fields(event)}
+
 
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_order(order: OrderCreate):
@@ -21,57 +104,29 @@ async def create_order(order: OrderCreate):
     - **customer_email**: Email del cliente
     
     Este endpoint:
-    1. Guarda la orden en MongoDB
-    2. Publica un mensaje en RabbitMQ (cola: orders_queue)
+    1. Guarda la orden en MongoDB junto con su evento `order.created` (outbox)
+    2. El relay del outbox publica el evento en RabbitMQ (cola: orders_queue)
     3. El servicio de notificaciones escuchará y procesará el mensaje
     """
     try:
         db = get_database()
         
-        # Crear documento de orden
-        order_dict = {
-            "product_name": order.product_name,
-            "quantity": order.quantity,
-            "customer_email": order.customer_email,
-            "created_at": datetime.utcnow(),
-            "status": "pending"
-        }
+        # Crear documento de orden (con su evento en el outbox)
+        created_order = _new_order_document(order)
         
         # Guardar en MongoDB
-        result = await db.orders.insert_one(order_dict)
-        
-        # Obtener la orden creada
-        created_order = await db.orders.find_one({"_id": result.inserted_id})
+        result = await db.orders.insert_one(created_order)
         
         logger.info(f"✅ Order created in database: {result.inserted_id}")
         
-        # Publicar mensaje en RabbitMQ
-        try:
-            publisher = get_rabbitmq_publisher()
-            publisher.publish_order({
-                "_id": str(created_order["_id"]),
-                "product_name": created_order["product_name"],
-                "quantity": created_order["quantity"],
-                "customer_email": created_order["customer_email"],
-                "created_at": created_order["created_at"],
-                "status": created_order["status"]
-            })
-            logger.info(f"✅ Order published to RabbitMQ: {result.inserted_id}")
-        except Exception as rabbit_error:
-            # Loguear error pero no fallar la petición
-            # La orden ya está guardada en la BD
-            logger.error(f"⚠️ Error publishing to RabbitMQ: {rabbit_error}")
-            logger.warning(f"Order {result.inserted_id} created but not published to queue")
+        # Agregados por día y producto (se acumulan y se escriben en segundo plano)
+        await get_order_stats().record_created(db, [created_order])
         
-        # Retornar respuesta
-        return OrderResponse(
-            _id=str(created_order["_id"]),
-            product_name=created_order["product_name"],
-            quantity=created_order["quantity"],
-            customer_email=created_order["customer_email"],
-            created_at=created_order["created_at"],
-            status=created_order["status"]
-        )
+        # Avisar al relay para publicar sin esperar al siguiente sondeo
+        get_outbox_relay().notify()
+        
+        # Retornar respuesta (serializada una sola vez, sin revalidar)
+        return ModelResponse(_order_response(created_order), status_code=status.HTTP_201_CREATED)
         
     except HTTPException:
         raise
@@ -83,6 +138,307 @@ async def create_order(order: OrderCreate):
         )
 
 
+async def _iter_bulk_rows(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Itera las filas del cuerpo de la creación masiva.
+
+    - `application/x-ndjson`: se lee el cuerpo en streaming, una fila por línea
+    - cualquier otro content type: se espera un array JSON
+
+    Las líneas NDJSON que no son JSON válido se emiten como ValueError.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type:
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    yield index, json.loads(line)
+                except ValueError as e:
+                    yield index, ValueError(f"Invalid JSON: {e}")
+                index += 1
+        if buffer.strip():
+            try:
+                yield index, json.loads(buffer)
+            except ValueError as e:
+                yield index, ValueError(f"Invalid JSON: {e}")
+        return
+
+    try:
+        rows = await request.json()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array or NDJSON"
+        )
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array of orders"
+        )
+    for index, row in enumerate(rows):
+        yield index, row
+
+
+def _validation_message(error: ValidationError) -> str:
+    """Resume los errores de Pydantic en una línea"""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+async def _create_chunk(db, chunk: List[Tuple[int, Any]]) -> List[BulkOrderResult]:
+    """
+    Valida e inserta un bloque de filas con un único insert_many no ordenado
+    (un error solo rechaza su fila, no el bloque entero). Cada documento
+    lleva su evento en el outbox, igual que en la creación individual.
+    """
+    results: List[BulkOrderResult] = []
+    docs: List[Tuple[int, Dict[str, Any]]] = []
+
+    for index, row in chunk:
+        if isinstance(row, ValueError):
+            results.append(BulkOrderResult.model_construct(index=index, status="invalid", id=None, error=str(row)))
+            continue
+        try:
+            docs.append((index, _new_order_document(OrderCreate.model_validate(row))))
+        except ValidationError as e:
+            results.append(BulkOrderResult.model_construct(index=index, status="invalid", id=None, error=_validation_message(e)))
+
+    if not docs:
+        return results
+
+    failed: Dict[int, Dict[str, Any]] = {}
+    try:
+        await db.orders.insert_many([doc for _, doc in docs], ordered=False)
+    except BulkWriteError as e:
+        failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+
+    created = []
+    for position, (index, doc) in enumerate(docs):
+        error = failed.get(position)
+        if error is None:
+            created.append(doc)
+            results.append(BulkOrderResult.model_construct(index=index, status="created", id=str(doc["_id"]), error=None))
+        else:
+            results.append(BulkOrderResult.model_construct(index=index, status="error", id=None, error=error.get("errmsg")))
+
+    # Agregados del bloque en un único bulk_write
+    await get_order_stats().record_created(db, created)
+
+    return results
+
+
+@router.post("/bulk", response_model=BulkOrderResponse)
+async def bulk_create_orders(request: Request):
+    """
+    Creación masiva de órdenes.
+
+    Acepta un array JSON o un cuerpo NDJSON (`Content-Type: application/x-ndjson`,
+    una orden `{"product_name", "quantity", "customer_email"}` por línea, leído
+    en streaming). Cada fila se valida con `OrderCreate`; las válidas se
+    insertan en bloques de `ORDERS_BULK_CHUNK_SIZE` con `insert_many` no ordenado.
+
+    Los eventos `order.created` se guardan en el outbox de cada orden y el
+    relay los publica por lotes (con confirmaciones en pipeline) mientras se
+    insertan los bloques siguientes.
+
+    Devuelve un informe por fila (**created** / **invalid** / **error**)
+    sin abortar el lote completo.
+    """
+    try:
+        db = get_database()
+        relay = get_outbox_relay()
+
+        results: List[BulkOrderResult] = []
+        chunk: List[Tuple[int, Any]] = []
+
+        async for row in _iter_bulk_rows(request):
+            chunk.append(row)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                results.extend(await _create_chunk(db, chunk))
+                relay.notify()
+                chunk = []
+        if chunk:
+            results.extend(await _create_chunk(db, chunk))
+            relay.notify()
+
+        results.sort(key=lambda result: result.index)
+        counts = {"created": 0, "invalid": 0, "error": 0}
+        for result in results:
+            counts[result.status] += 1
+
+        logger.info(
+            f"✅ Bulk order creation finished: {counts['created']} created, "
+            f"{counts['invalid']} invalid, {counts['error']} errors"
+        )
+
+        return ModelResponse(BulkOrderResponse.model_construct(
+            created=counts["created"],
+            invalid=counts["invalid"],
+            errors=counts["error"],
+            results=results
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error creating orders in bulk: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating orders: {str(e)}"
+        )
+
+
+def _encode_cursor(order: Dict[str, Any]) -> str:
+    """Cursor opaco con la posición (created_at, _id) de la última orden de la página"""
+    raw = f"{order['created_at'].isoformat()}|{order['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decodifica un cursor de _encode_cursor (400 si no es válido)"""
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), ObjectId(order_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+@router.get("/", response_model=OrderListResponse)
+async def list_orders(
+    customer_email: Optional[str] = Query(None, description="Only orders of this customer"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Only orders with this status"),
+    since: Optional[datetime] = Query(None, description="Only orders created at or after this date"),
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT, description="Page size"),
+    after: Optional[str] = Query(None, description="`next_cursor` of the previous page")
+):
+    """
+    Listar órdenes, más recientes primero.
+
+    - **customer_email**: historial de un cliente
+    - **status**: filtrar por estado
+    - **since**: órdenes creadas desde esta fecha
+    - **limit**: tamaño de página
+    - **after**: cursor `next_cursor` de la página anterior
+
+    La paginación es por keyset sobre `(created_at, _id)` en lugar de
+    skip/offset: cada página continúa en el índice justo después de la
+    última orden devuelta, así que su coste no crece con el número de
+    página y solo se leen `limit + 1` documentos (con la proyección pública).
+    """
+    try:
+        db = get_read_database()
+
+        query: Dict[str, Any] = {}
+        if customer_email:
+            query["customer_email"] = customer_email
+        if status_filter:
+            query["status"] = status_filter
+        if since:
+            # Las fechas se guardan en UTC sin zona horaria
+            if since.tzinfo:
+                since = since.astimezone(timezone.utc).replace(tzinfo=None)
+            query["created_at"] = {"$gte": since}
+        if after:
+            last_created_at, last_id = _decode_cursor(after)
+            query["$or"] = [
+                {"created_at": {"$lt": last_created_at}},
+                {"created_at": last_created_at, "_id": {"$lt": last_id}}
+            ]
+
+        # Una orden de más para saber si hay página siguiente
+        orders = await db.orders.find(query, ORDER_PUBLIC_PROJECTION) \
+            .sort(LIST_SORT) \
+            .limit(limit + 1) \
+            .to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = _encode_cursor(orders[-1])
+
+        logger.info(f"✅ Orders listed: {len(orders)}")
+
+        return ModelResponse(OrderListResponse.model_construct(
+            orders=[_order_response(order) for order in orders],
+            next_cursor=next_cursor
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error listing orders: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error listing orders: {str(e)}"
+        )
+
+
+@router.get("/stats", response_model=OrderStatsResponse)
+async def get_orders_stats(
+    since: Optional[date] = Query(None, description="First day (UTC), inclusive"),
+    until: Optional[date] = Query(None, description="Last day (UTC), inclusive"),
+    product_name: Optional[str] = Query(None, description="Only this product")
+):
+    """
+    Estadísticas de órdenes por día y producto.
+
+    - **since** / **until**: rango de días (UTC, inclusivo)
+    - **product_name**: filtrar por producto
+
+    Responde desde los agregados precalculados (colección `order_stats`,
+    actualizada con `$inc` al crear órdenes y al cambiar su estado): el
+    coste depende del número de buckets del rango, no del de órdenes. Los
+    incrementos se escriben cada ORDER_STATS_FLUSH_INTERVAL_MS, así que las
+    órdenes más recientes pueden tardar ese intervalo en aparecer.
+    """
+    try:
+        db = get_read_database()
+
+        buckets = await get_order_stats().query(db, since=since, until=until, product_name=product_name)
+
+        by_status: Dict[str, int] = {}
+        for bucket in buckets:
+            for order_status, count in bucket.get("by_status", {}).items():
+                by_status[order_status] = by_status.get(order_status, 0) + count
+
+        return ModelResponse(OrderStatsResponse.model_construct(
+            orders=sum(bucket.get("orders", 0) for bucket in buckets),
+            quantity=sum(bucket.get("quantity", 0) for bucket in buckets),
+            by_status=by_status,
+            buckets=[
+                OrderStatsBucket.model_construct(
+                    day=bucket["day"],
+                    product_name=bucket["product_name"],
+                    orders=bucket.get("orders", 0),
+                    quantity=bucket.get("quantity", 0),
+                    by_status=bucket.get("by_status", {})
+                )
+                for bucket in buckets
+            ]
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error retrieving order stats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving order stats: {str(e)}"
+        )
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(order_id: str):
     """
@@ -91,8 +447,7 @@ async def get_order(order_id: str):
     - **order_id**: ID único de la orden (ObjectId de MongoDB)
     """
     try:
-        from bson import ObjectId
-        db = get_database()
+        db = get_read_database()
         
         # Validar ObjectId
         if not ObjectId.is_valid(order_id):
@@ -101,8 +456,14 @@ async def get_order(order_id: str):
                 detail="Invalid order ID format"
             )
         
-        # Buscar orden
-        order = await db.orders.find_one({"_id": ObjectId(order_id)})
+        async def load_order():
+            order = await db.orders.find_one({"_id": ObjectId(order_id)}, ORDER_PUBLIC_PROJECTION)
+            if order:
+                order["_id"] = str(order["_id"])
+            return order
+        
+        # Buscar orden (primero en caché)
+        order = await get_cache().get_or_load(_order_cache_key(order_id), load_order)
         
         if not order:
             raise HTTPException(
@@ -112,14 +473,15 @@ async def get_order(order_id: str):
         
         logger.info(f"✅ Order retrieved: {order_id}")
         
-        return OrderResponse(
-            _id=str(order["_id"]),
+        # Se valida aquí (una vez): desde Redis la fecha llega como texto
+        return ModelResponse(OrderResponse(
+            _id=order["_id"],
             product_name=order["product_name"],
             quantity=order["quantity"],
             customer_email=order["customer_email"],
             created_at=order["created_at"],
             status=order.get("status", "pending")
-        )
+        ))
         
     except HTTPException:
         raise
@@ -129,3 +491,91 @@ async def get_order(order_id: str):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving order: {str(e)}"
         )
+
+
+@router.patch("/{order_id}/status", response_model=OrderResponse)
+async def update_order_status(order_id: str, update: OrderStatusUpdate):
+    """
+    Cambiar el estado de una orden.
+
+    - **order_id**: ID único de la orden
+    - **status**: nuevo estado
+
+    Transiciones permitidas: pending → confirmed → shipped → delivered,
+    y pending / confirmed → cancelled.
+
+    Cada transición es un compare-and-set atómico: un único
+    `find_one_and_update` condicionado al estado anterior, que además
+    guarda el evento `order.status_changed` en el outbox de la orden. Si
+    otra petición cambió el estado antes, la condición no se cumple y se
+    responde 409, sin locks ni lecturas previas.
+    """
+    try:
+        db = get_database()
+
+        if not ObjectId.is_valid(order_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid order ID format"
+            )
+
+        new_status = update.status
+        previous_states = [
+            current for current, targets in ORDER_STATUS_TRANSITIONS.items()
+            if new_status in targets
+        ]
+
+        # Un intento por estado de origen válido (como mucho dos): así el
+        # evento registra el estado anterior exacto
+        order = None
+        for previous_status in previous_states:
+            changed_at = _utcnow_ms()
+            event = new_outbox_event("order.status_changed", {
+                "event_type": "order.status_changed",
+                "_id": order_id,
+                "previous_status": previous_status,
+                "status": new_status,
+                "changed_at": changed_at
+            })
+            order = await db.orders.find_one_and_update(
+                {"_id": ObjectId(order_id), "status": previous_status},
+                {
+                    "$set": {"status": new_status, "updated_at": changed_at, "outbox_pending": True},
+                    "$push": {"pending_events": event}
+                },
+                projection=ORDER_PUBLIC_PROJECTION,
+                return_document=ReturnDocument.AFTER
+            )
+            if order:
+                break
+
+        if order:
+            await get_order_stats().record_status_change(db, order, previous_status, new_status)
+        else:
+            # La transición no se aplicó: distinguir orden inexistente de estado inválido
+            current = await db.orders.find_one({"_id": ObjectId(order_id)}, {"status": 1})
+            if not current:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Order with ID {order_id} not found"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Invalid status transition: {current.get('status', 'pending')} -> {new_status}"
+            )
+
+        await get_cache().invalidate(_order_cache_key(order_id))
+        get_outbox_relay().notify()
+
+        logger.info(f"✅ Order {order_id} status changed to {new_status}")
+
+        return ModelResponse(_order_response(order))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error updating order status: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating order status: {str(e)}"
+        )
@@ -0,0 +1,55 @@
+"""
+Round trips a MongoDB por endpoint de escritura.
+
+La orden (con su evento del outbox) se escribe en un solo comando. Los
+agregados de order_stats no se escriben en la petición: se acumulan y el
+flusher los escribe en segundo plano con un bulk_write (ver config/stats.py).
+"""
+import pytest
+
+from config.stats import get_order_stats
+
+pytestmark = pytest.mark.anyio
+
+NEW_ORDER = {"product_name": "Laptop Dell XPS 15", "quantity": 2, "customer_email": "cliente@example.com"}
+MISSING_ID = "0123456789abcdef01234567"
+
+
+async def _create_order(client, commands) -> str:
+    response = await client.post("/orders/", json=NEW_ORDER)
+    assert response.status_code == 201
+    commands.reset()
+    return response.json()["_id"]
+
+
+async def test_create_order_is_one_insert(client, commands):
+    response = await client.post("/orders/", json=NEW_ORDER)
+
+    assert response.status_code == 201
+    assert commands.commands == [("orders", "insert_one")]
+
+
+async def test_status_change_is_one_find_one_and_update(client, commands):
+    order_id = await _create_order(client, commands)
+
+    response = await client.patch(f"/orders/{order_id}/status", json={"status": "confirmed"})
+
+    assert response.status_code == 200
+    assert commands.commands == [("orders", "find_one_and_update")]
+
+
+async def test_stats_flush_is_one_bulk_write(client, commands):
+    await _create_order(client, commands)
+    await client.post("/orders/", json=NEW_ORDER)
+    order_id = (await client.post("/orders/", json=NEW_ORDER)).json()["_id"]
+    await client.patch(f"/orders/{order_id}/status", json={"status": "confirmed"})
+    commands.reset()
+
+    from config.database import get_database
+    await get_order_stats().flush(get_database())
+
+    assert commands.commands == [("order_stats", "bulk_write")]
+    bucket = await get_database().order_stats.find_one({})
+    assert bucket["orders"] == 3
+    assert bucket["quantity"] == 6
+    assert bucket["by_status"] == {"pending": 2, "confirmed": 1}
@@ -5,7 +5,7 @@ Write-Host "🧪 Probando Microservices API..." -ForegroundColor Cyan
 Write-Host ""
 
 # URL base
-$BASE_URL = "http://localhost:8001"
+$BASE_URL = "http://localhost:8002"
 
 Write-Host "1️⃣ Health Check..." -ForegroundColor Yellow
 Invoke-RestMethod -Uri "$BASE_URL/health" -Method Get | ConvertTo-Json
@@ -46,17 +46,36 @@ $order3 = @{
 
 $response = Invoke-RestMethod -Uri "$BASE_URL/orders/" -Method Post -Body $order3 -ContentType "application/json"
 $response | ConvertTo-Json
-$ORDER_ID = $response.id
+$ORDER_ID = $response._id
 Write-Host ""
 
 Write-Host "5️⃣ Consultando última orden creada (ID: $ORDER_ID)..." -ForegroundColor Yellow
 Invoke-RestMethod -Uri "$BASE_URL/orders/$ORDER_ID" -Method Get | ConvertTo-Json
 Write-Host ""
 
+Write-Host "6️⃣ Confirmando la última orden creada..." -ForegroundColor Yellow
+$statusChange = @{
+    status = "confirmed"
+} | ConvertTo-Json
+
+Invoke-RestMethod -Uri "$BASE_URL/orders/$ORDER_ID/status" -Method Patch -Body $statusChange -ContentType "application/json" | ConvertTo-Json
+Write-Host ""
+
+Write-Host "7️⃣ Creando órdenes en lote (una fila inválida)..." -ForegroundColor Yellow
+# -InputObject para que un array se serialice como array JSON
+$bulkOrders = ConvertTo-Json -InputObject @(
+    @{ product_name = "Monitor LG 27"; quantity = 1; customer_email = "customer4@example.com" }
+    @{ product_name = "Webcam Logitech C920"; quantity = 2; customer_email = "customer5@example.com" }
+    @{ product_name = "Cable HDMI"; quantity = 0; customer_email = "customer6@example.com" }
+)
+
+Invoke-RestMethod -Uri "$BASE_URL/orders/bulk" -Method Post -Body $bulkOrders -ContentType "application/json" | ConvertTo-Json -Depth 5
+Write-Host ""
+
 Write-Host "✅ Pruebas completadas!" -ForegroundColor Green
 Write-Host ""
 Write-Host "📋 Verifica los logs del notifications_service con:" -ForegroundColor Cyan
 Write-Host "   docker-compose logs notifications_service" -ForegroundColor White
 Write-Host ""
-Write-Host "📖 Ver documentación interactiva en: http://localhost:8001/docs" -ForegroundColor Cyan
+Write-Host "📖 Ver documentación interactiva en: http://localhost:8002/docs" -ForegroundColor Cyan
 Write-Host "🐰 Ver RabbitMQ Management UI en: http://localhost:15672 (guest/guest)" -ForegroundColor Cyan
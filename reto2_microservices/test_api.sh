@@ -6,7 +6,7 @@ echo "🧪 Probando Microservices API..."
 echo ""
 
 # URL base
-BASE_URL="http://localhost:8001"
+BASE_URL="http://localhost:8002"
 
 echo "1️⃣ Health Check..."
 curl -s $BASE_URL/health | python -m json.tool
@@ -48,17 +48,33 @@ RESPONSE=$(curl -s -X POST "$BASE_URL/orders/" \
   }')
 
 echo $RESPONSE | python -m json.tool
-ORDER_ID=$(echo $RESPONSE | python -c "import sys, json; print(json.load(sys.stdin)['id'])")
+ORDER_ID=$(echo $RESPONSE | python -c "import sys, json; print(json.load(sys.stdin)['_id'])")
 echo -e "\n"
 
 echo "5️⃣ Consultando última orden creada (ID: $ORDER_ID)..."
 curl -s "$BASE_URL/orders/$ORDER_ID" | python -m json.tool
 echo -e "\n"
 
+echo "6️⃣ Confirmando la última orden creada..."
+curl -s -X PATCH "$BASE_URL/orders/$ORDER_ID/status" \
+  -H "Content-Type: application/json" \
+  -d '{"status": "confirmed"}' | python -m json.tool
+echo -e "\n"
+
+echo "7️⃣ Creando órdenes en lote (una fila inválida)..."
+curl -s -X POST "$BASE_URL/orders/bulk" \
+  -H "Content-Type: application/json" \
+  -d '[
+    {"product_name": "Monitor LG 27", "quantity": 1, "customer_email": "customer4@example.com"},
+    {"product_name": "Webcam Logitech C920", "quantity": 2, "customer_email": "customer5@example.com"},
+    {"product_name": "Cable HDMI", "quantity": 0, "customer_email": "customer6@example.com"}
+  ]' | python -m json.tool
+echo -e "\n"
+
 echo "✅ Pruebas completadas!"
 echo ""
 echo "📋 Verifica los logs del notifications_service para ver:"
 echo "   docker-compose logs notifications_service"
 echo ""
-echo "📖 Ver documentación interactiva en: http://localhost:8001/docs"
+echo "📖 Ver documentación interactiva en: http://localhost:8002/docs"
 echo "🐰 Ver RabbitMQ Management UI en: http://localhost:15672 (guest/guest)"